@@ -2,6 +2,7 @@ import hashlib
 import logging
 import os
 import re
+import threading
 import time
 from datetime import datetime, timezone
 from functools import lru_cache
@@ -9,6 +10,7 @@ from pprint import pformat
 from typing import Dict, List, Optional, Tuple
 
 import requests
+from cachetools import TTLCache
 from flask import Blueprint, jsonify, redirect, render_template, request, session
 
 from adviser_allocation.api.webhooks import build_chat_card_payload, send_chat_alert
@@ -134,7 +136,7 @@ def _fetch_hubspot_contact_by_id(contact_id: str) -> Optional[dict]:
         return None
     params = {"properties": "firstname,lastname,email,phone"}
     try:
-        response = requests.get(
+        response = box_service.HUBSPOT_SESSION.get(
             f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}",
             params=params,
             headers=_hubspot_headers(),
@@ -207,9 +209,10 @@ def _load_deals_for_contact_record(contact: dict) -> List[dict]:
         logger.error("HubSpot deal lookup failed for contact %s: %s", contact_id, exc)
         return []
     logger.info("Contact %s: retrieved %d associated HubSpot deal ids", contact_id, len(deal_ids))
+    deals_by_id = _fetch_hubspot_deals(deal_ids)
     deals: List[dict] = []
     for deal_id in deal_ids:
-        deal = _fetch_hubspot_deal(deal_id)
+        deal = deals_by_id.get(str(deal_id))
         if deal:
             deals.append(deal)
         else:
@@ -245,7 +248,7 @@ def _search_hubspot_contact_by_name(first: str, last: str) -> Optional[dict]:
         "properties": ["firstname", "lastname", "email", "hs_object_id"],
         "limit": 5,
     }
-    response = requests.post(
+    response = box_service.HUBSPOT_SESSION.post(
         "https://api.hubapi.com/crm/v3/objects/contacts/search",
         headers=_hubspot_headers(),
         json=payload,
@@ -616,7 +619,7 @@ def _fetch_spouse_from_contact_associations(contact_id: Optional[str]) -> Option
         "properties": ["firstname", "lastname", "email"],
     }
     try:
-        resp = requests.get(
+        resp = box_service.HUBSPOT_SESSION.get(
             f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}",
             headers=_hubspot_headers(),
             params=params,
@@ -641,7 +644,7 @@ def _fetch_spouse_from_contact_associations(contact_id: Optional[str]) -> Option
         return None
 
     try:
-        spouse_resp = requests.get(
+        spouse_resp = box_service.HUBSPOT_SESSION.get(
             f"https://api.hubspot.com/crm/v3/objects/contacts/{spouse_id}",
             headers=_hubspot_headers(),
             params={"properties": ["firstname", "lastname", "email"]},
@@ -719,9 +722,10 @@ def _load_contact_details_with_deals(email: str) -> Tuple[Optional[dict], List[d
         )
         deal_ids = []
 
+    deals_by_id = _fetch_hubspot_deals(deal_ids)
     deals: List[dict] = []
     for deal_id in deal_ids:
-        deal = _fetch_hubspot_deal(deal_id)
+        deal = deals_by_id.get(str(deal_id))
         if not deal:
             warnings.append(
                 {
@@ -1413,7 +1417,37 @@ def _build_metadata_from_payload(payload: dict) -> Tuple[dict, List[dict], Optio
     return metadata, contacts, share_email
 
 
+# Previews, applies and webhook retries often ask for the same deal within
+# seconds; each fetch costs a deal GET plus the contact lookups, so successful
+# results are reused briefly. Property updates through this module evict them.
+_deal_metadata_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_deal_metadata_lock = threading.Lock()
+
+
+def _invalidate_deal_metadata(deal_id: Optional[str] = None) -> None:
+    """Drop cached metadata for one deal, or for every deal when no ID is given."""
+    with _deal_metadata_lock:
+        if deal_id is None:
+            _deal_metadata_cache.clear()
+        else:
+            _deal_metadata_cache.pop(str(deal_id), None)
+
+
 def _fetch_deal_metadata(deal_id: str) -> Optional[dict]:
+    """Return HubSpot-derived Box metadata for a deal (60-second cache)."""
+    key = str(deal_id)
+    with _deal_metadata_lock:
+        cached = _deal_metadata_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    metadata = _load_deal_metadata(key)
+    if metadata is not None:
+        with _deal_metadata_lock:
+            _deal_metadata_cache[key] = dict(metadata)
+    return metadata
+
+
+def _load_deal_metadata(deal_id: str) -> Optional[dict]:
     try:
         url = f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}"
         params = {
@@ -1427,7 +1461,9 @@ def _fetch_deal_metadata(deal_id: str) -> Optional[dict]:
                 "deal_salutation",
             ]
         }
-        resp = requests.get(url, headers=_hubspot_headers(), params=params, timeout=10)
+        resp = box_service.HUBSPOT_SESSION.get(
+            url, headers=_hubspot_headers(), params=params, timeout=10
+        )
         if resp.status_code == 404:
             logger.warning("HubSpot deal %s not found while fetching metadata", deal_id)
             return None
@@ -1620,7 +1656,7 @@ def _search_hubspot_contact_by_email(email: str) -> Optional[dict]:
 def _fetch_contact_associated_deal_ids(contact_id: str) -> List[str]:
     url = f"https://api.hubapi.com/crm/v4/objects/contacts/{contact_id}/associations/deals"
     logger.info("HubSpot associations query: GET %s", url)
-    resp = requests.get(url, headers=_hubspot_headers(), timeout=10)
+    resp = box_service.HUBSPOT_SESSION.get(url, headers=_hubspot_headers(), timeout=10)
     resp.raise_for_status()
     return [
         str(entry.get("toObjectId"))
@@ -1629,51 +1665,93 @@ def _fetch_contact_associated_deal_ids(contact_id: str) -> List[str]:
     ]
 
 
+_HUBSPOT_DEAL_PROPERTIES = [
+    "dealname",
+    "dealstage",
+    "pipeline",
+    "amount",
+    "closedate",
+    "agreement_start_date",
+    "hs_deal_record_id",
+    "deal_salutation",
+    "household_type",
+    "hs_spouse_id",
+    "hs_spouse_firstname",
+    "hs_spouse_lastname",
+    "hs_spouse_email",
+    "hs_contact_id",
+    "hs_contact_firstname",
+    "hs_contact_lastname",
+    "hs_contact_email",
+]
+_HUBSPOT_BATCH_READ_LIMIT = 100
+
+
+def _hubspot_deal_url(deal_id: str) -> str:
+    return f"https://app.hubspot.com/contacts/{_hubspot_portal_id()}/record/0-3/{deal_id}"
+
+
 def _fetch_hubspot_deal(deal_id: str) -> Optional[dict]:
     try:
         url = f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}"
-        params = {
-            "properties": [
-                "dealname",
-                "dealstage",
-                "pipeline",
-                "amount",
-                "closedate",
-                "agreement_start_date",
-                "hs_deal_record_id",
-                "deal_salutation",
-                "household_type",
-                "hs_spouse_id",
-                "hs_spouse_firstname",
-                "hs_spouse_lastname",
-                "hs_spouse_email",
-                "hs_contact_id",
-                "hs_contact_firstname",
-                "hs_contact_lastname",
-                "hs_contact_email",
-            ]
-        }
-        resp = requests.get(url, headers=_hubspot_headers(), params=params, timeout=10)
+        params = {"properties": _HUBSPOT_DEAL_PROPERTIES}
+        resp = box_service.HUBSPOT_SESSION.get(
+            url, headers=_hubspot_headers(), params=params, timeout=10
+        )
         if resp.status_code == 404:
             return None
         resp.raise_for_status()
         data = resp.json()
-        data["url"] = (
-            f"https://app.hubspot.com/contacts/{_hubspot_portal_id()}/record/0-3/{deal_id}"
-        )
+        data["url"] = _hubspot_deal_url(deal_id)
         return data
     except requests.RequestException as exc:
         logger.error("Failed to fetch HubSpot deal %s: %s", deal_id, exc)
         return None
 
 
+def _fetch_hubspot_deals(deal_ids: List[str]) -> Dict[str, dict]:
+    """Load known deals by ID with HubSpot's batch read, keyed by deal ID.
+
+    Deals that do not exist are omitted. If a batch request fails, its deals
+    are fetched one at a time instead.
+    """
+    ids = list(dict.fromkeys(str(deal_id) for deal_id in deal_ids if deal_id))
+    deals: Dict[str, dict] = {}
+    for start in range(0, len(ids), _HUBSPOT_BATCH_READ_LIMIT):
+        batch = ids[start : start + _HUBSPOT_BATCH_READ_LIMIT]
+        try:
+            resp = box_service.HUBSPOT_SESSION.post(
+                "https://api.hubapi.com/crm/v3/objects/deals/batch/read",
+                headers=_hubspot_headers(),
+                json={
+                    "properties": _HUBSPOT_DEAL_PROPERTIES,
+                    "inputs": [{"id": deal_id} for deal_id in batch],
+                },
+                timeout=10,
+            )
+            resp.raise_for_status()
+        except requests.RequestException as exc:
+            logger.warning("HubSpot deal batch read failed, fetching individually: %s", exc)
+            for deal_id in batch:
+                deal = _fetch_hubspot_deal(deal_id)
+                if deal:
+                    deals[deal_id] = deal
+            continue
+        for deal in resp.json().get("results", []):
+            deal_id = str(deal.get("id") or "")
+            if deal_id:
+                deal["url"] = _hubspot_deal_url(deal_id)
+                deals[deal_id] = deal
+    return deals
+
+
 def _update_hubspot_deal_properties(deal_id: str, properties: Dict[str, object]) -> bool:
     deal_id = (deal_id or "").strip()
     if not deal_id or not properties:
         return False
     payload = {"properties": properties}
     try:
-        resp = requests.patch(
+        resp = box_service.HUBSPOT_SESSION.patch(
             f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}",
             headers=_hubspot_headers(),
             json=payload,
@@ -1687,6 +1765,7 @@ def _update_hubspot_deal_properties(deal_id: str, properties: Dict[str, object])
             )
             return False
         resp.raise_for_status()
+        _invalidate_deal_metadata(deal_id)
         return True
     except requests.RequestException as exc:
         logger.debug(
@@ -1705,7 +1784,7 @@ def _update_hubspot_contact_property(contact_id: str, property_name: str, value:
         return False
     payload = {"properties": {property_name: value}}
     try:
-        resp = requests.patch(
+        resp = box_service.HUBSPOT_SESSION.patch(
             f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}",
             headers=_hubspot_headers(),
             json=payload,
@@ -1717,6 +1796,8 @@ def _update_hubspot_contact_property(contact_id: str, property_name: str, value:
             )
             return False
         resp.raise_for_status()
+        # Contact details are folded into every deal they belong to
+        _invalidate_deal_metadata()
         return True
     except requests.RequestException as exc:
         logger.debug(
@@ -5,12 +5,14 @@ import logging
 import os
 import re
 from datetime import datetime, timezone
-from typing import Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 import requests
 from flask import Blueprint, jsonify, request
 
-from adviser_allocation.core.allocation import get_adviser
+from adviser_allocation.core.allocation import get_adviser, refresh_global_closure_cache
 from adviser_allocation.services.allocation_service import store_allocation_record
 from adviser_allocation.utils.auth import require_hubspot_signature
 from adviser_allocation.utils.common import SYDNEY_TZ, sydney_now
@@ -26,10 +28,14 @@ webhooks_bp = Blueprint("webhooks_api", __name__)
 logger = logging.getLogger(__name__)
 
 HUBSPOT_TOKEN = get_secret("HUBSPOT_TOKEN")
-HUBSPOT_HEADERS = {
-    "Authorization": f"Bearer {HUBSPOT_TOKEN}" if HUBSPOT_TOKEN else None,
-    "Content-Type": "application/json",
-}
+# Read-only so no caller can change the headers every request shares
+HUBSPOT_HEADERS = (
+    MappingProxyType(
+        {"Authorization": f"Bearer {HUBSPOT_TOKEN}", "Content-Type": "application/json"}
+    )
+    if HUBSPOT_TOKEN
+    else None
+)
 CHAT_WEBHOOK_URL = get_secret("CHAT_WEBHOOK_URL")
 
 
@@ -38,20 +44,27 @@ def init_webhooks():
     return webhooks_bp
 
 
+_NAME_SEPARATORS = re.compile(r"[._-]+")
+_TAG_SEPARATORS = re.compile(r"[;,/|]+")
+
+
 def _format_display_name(email: str) -> str:
     """Format email address into display name."""
     local = (email or "").split("@")[0]
-    parts = re.split(r"[._-]+", local)
+    parts = _NAME_SEPARATORS.split(local)
     return " ".join(part.capitalize() for part in parts if part) or (email or "")
 
 
 def _format_tag_list(raw: str) -> list[str]:
     """Format raw tag string into list of formatted tags."""
-    parts = [p.strip() for p in re.split(r"[;,/|]+", raw or "") if p.strip()]
-    formatted = []
-    for part in parts:
-        formatted.append(part.upper() if part.upper() == "IPO" else part.title())
-    return formatted
+    return list(_formatted_tags(raw or ""))
+
+
+@lru_cache(maxsize=256)
+def _formatted_tags(raw: str) -> tuple[str, ...]:
+    """Split and title-case a tag string; the same package strings recur per adviser."""
+    parts = [p.strip() for p in _TAG_SEPARATORS.split(raw) if p.strip()]
+    return tuple(part.upper() if part.upper() == "IPO" else part.title() for part in parts)
 
 
 def send_chat_alert(payload: dict):
@@ -83,18 +96,74 @@ def build_chat_card_payload(title: str, sections: list[dict]) -> dict:
     return {"cards": [{"header": {"title": title}, "sections": card_sections}]}
 
 
+def _candidate_card_line(cand: dict) -> str:
+    """Render one eligible adviser for the allocation chat card."""
+    services = ", ".join(_format_tag_list(cand.get("service_packages"))) or "Not specified"
+    households = ", ".join(_format_tag_list(cand.get("household_type"))) or "Not specified"
+    return (
+        f"<b>{cand.get('name')}</b> ({cand.get('email')})<br>"
+        f"<i>Services:</i> {services}<br>"
+        f"<i>Households:</i> {households}<br>"
+        f"<i>Earliest Week:</i> {cand.get('earliest_open_week_label') or 'Unknown'}"
+    )
+
+
+def _allocation_chat_card(
+    deal_id: str,
+    deal_service_display: str,
+    deal_household_display: str,
+    adviser_name: str,
+    chosen_email: str,
+    adviser_service_tags: list[str],
+    adviser_household_tags: list[str],
+    candidate_list: list[dict],
+) -> dict:
+    """Build the Google Chat card announcing a completed allocation."""
+    candidate_lines = [_candidate_card_line(cand) for cand in candidate_list] or [
+        "No eligible advisers"
+    ]
+    selected_entry = next((c for c in candidate_list if c.get("email") == chosen_email), None)
+    selected_earliest = (
+        selected_entry.get("earliest_open_week_label") if selected_entry else None
+    ) or "Unknown"
+
+    deal_section = [
+        f"<b>Deal ID:</b> `{deal_id}`",
+        f"<b>Service Package:</b> {deal_service_display}",
+        f"<b>Household Type:</b> {deal_household_display}",
+    ]
+    selected_section = [
+        f"<b>{adviser_name}</b> ({chosen_email})",
+        f"<i>Service Packages:</i> {', '.join(adviser_service_tags) or 'Not specified'}",
+        f"<i>Household Types:</i> {', '.join(adviser_household_tags) or 'Not specified'}",
+        f"<i>Earliest Week:</i> {selected_earliest}",
+    ]
+    return build_chat_card_payload(
+        "Deal Allocation",
+        [
+            {"header": "Deal Details", "lines": deal_section},
+            {"header": "Eligible Advisers", "lines": candidate_lines},
+            {"header": "Selected Adviser", "lines": selected_section},
+        ],
+    )
+
+
 def format_agreement_start(agreement_value):
     """Format agreement start date for display."""
     if not agreement_value:
         return ""
     try:
+        # Epoch milliseconds may arrive as numbers or digit strings
+        if isinstance(agreement_value, (int, float)) and not isinstance(agreement_value, bool):
+            return datetime.fromtimestamp(agreement_value / 1000, tz=SYDNEY_TZ).date().isoformat()
         value = str(agreement_value).strip()
         if not value:
             return ""
         if value.isdigit():
             dt = datetime.fromtimestamp(int(value) / 1000, tz=SYDNEY_TZ)
         else:
-            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            # fromisoformat accepts a trailing "Z" on Python 3.11+
+            parsed = datetime.fromisoformat(value)
             if parsed.tzinfo is None:
                 parsed = parsed.replace(tzinfo=SYDNEY_TZ)
             dt = parsed.astimezone(SYDNEY_TZ)
@@ -116,9 +185,9 @@ def _resolve_field(fields: dict, primary: str, fallback: str, default: str = "")
     return default
 
 
-def _hubspot_headers() -> dict:
+def _hubspot_headers() -> Mapping[str, str]:
     """Return HubSpot API headers, raising if token not configured."""
-    if not HUBSPOT_HEADERS.get("Authorization"):
+    if HUBSPOT_HEADERS is None:
         raise RuntimeError("HUBSPOT_TOKEN is not configured")
     return HUBSPOT_HEADERS
 
@@ -140,10 +209,13 @@ def handle_allocation():
             "----- /post/allocate start %s -----",
             sydney_now().isoformat(),
         )
-        logger.info(
-            "Received allocation payload: %s",
-            json.dumps(event, indent=2, sort_keys=True),
-        )
+        # The raw payload is persisted with the allocation record, so the
+        # serialised copy is only needed when tracing locally.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Received allocation payload: %s",
+                json.dumps(event, separators=(",", ":"), sort_keys=True),
+            )
 
         if event.get("object", {}).get("objectType", ""):
             fields = event.get("fields", {})
@@ -221,6 +293,28 @@ def handle_allocation():
             )
             agreement_start_display = format_agreement_start(agreement_start_date)
 
+            # Every outcome below records the same allocation context; only the
+            # status and error differ.
+            allocation_fields = {
+                "client_email": fields.get("client_email", ""),
+                "adviser_email": chosen_email,
+                "adviser_name": adviser_name,
+                "adviser_hubspot_id": hubspot_owner_id,
+                "adviser_service_packages": adviser_service_tags,
+                "adviser_household_types": adviser_household_tags,
+                "deal_id": deal_id,
+                "service_package": deal_service_display,
+                "service_package_raw": service_package,
+                "household_type": deal_household_display,
+                "household_type_raw": household_type,
+                "agreement_start_date": agreement_start_display,
+                "agreement_start_raw": agreement_start_date,
+            }
+            request_fields = {
+                "ip_address": request.remote_addr,
+                "user_agent": request.headers.get("User-Agent", ""),
+            }
+
             try:
                 deal_update_url = f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}"
                 payload = {"properties": {"advisor": hubspot_owner_id}}
@@ -242,86 +336,26 @@ def handle_allocation():
                 logger.info("Persisting allocation record for deal %s", deal_id)
                 store_allocation_record(
                     None,
-                    {
-                        "client_email": fields.get("client_email", ""),
-                        "adviser_email": chosen_email,
-                        "adviser_name": adviser_name,
-                        "adviser_hubspot_id": hubspot_owner_id,
-                        "adviser_service_packages": adviser_service_tags,
-                        "adviser_household_types": adviser_household_tags,
-                        "deal_id": deal_id,
-                        "service_package": deal_service_display,
-                        "service_package_raw": service_package,
-                        "household_type": deal_household_display,
-                        "household_type_raw": household_type,
-                        "agreement_start_date": agreement_start_display,
-                        "agreement_start_raw": agreement_start_date,
-                        "allocation_result": "completed",
-                        "status": "completed",
-                    },
+                    {**allocation_fields, "allocation_result": "completed", "status": "completed"},
                     source="hubspot_webhook",
                     raw_request=event,
-                    extra_fields={
-                        "ip_address": request.remote_addr,
-                        "user_agent": request.headers.get("User-Agent", ""),
-                    },
+                    extra_fields=request_fields,
                 )
 
-                candidate_lines = []
-                for cand in candidate_list:
-                    cand_services = (
-                        ", ".join(_format_tag_list(cand.get("service_packages"))) or "Not specified"
-                    )
-                    cand_households = (
-                        ", ".join(_format_tag_list(cand.get("household_type"))) or "Not specified"
-                    )
-                    cand_earliest = cand.get("earliest_open_week_label") or "Unknown"
-                    candidate_lines.append(
-                        f"<b>{cand.get('name')}</b> ({cand.get('email')})<br>"
-                        f"<i>Services:</i> {cand_services}<br>"
-                        f"<i>Households:</i> {cand_households}<br>"
-                        f"<i>Earliest Week:</i> {cand_earliest}"
-                    )
-                if not candidate_lines:
-                    candidate_lines = ["No eligible advisers"]
-
-                selected_services = (
-                    ", ".join(adviser_service_tags) if adviser_service_tags else "Not specified"
-                )
-                selected_households = (
-                    ", ".join(adviser_household_tags) if adviser_household_tags else "Not specified"
-                )
-                selected_entry = next(
-                    (c for c in candidate_list if c.get("email") == chosen_email),
-                    None,
-                )
-                selected_earliest = (
-                    selected_entry.get("earliest_open_week_label") if selected_entry else None
-                ) or "Unknown"
-
-                deal_section = [
-                    f"<b>Deal ID:</b> `{deal_id}`",
-                    f"<b>Service Package:</b> {deal_service_display}",
-                    f"<b>Household Type:</b> {deal_household_display}",
-                ]
-
-                selected_section = [
-                    f"<b>{adviser_name}</b> ({chosen_email})",
-                    f"<i>Service Packages:</i> {selected_services}",
-                    f"<i>Household Types:</i> {selected_households}",
-                    f"<i>Earliest Week:</i> {selected_earliest}",
-                ]
-
-                payload = build_chat_card_payload(
-                    "Deal Allocation",
-                    [
-                        {"header": "Deal Details", "lines": deal_section},
-                        {"header": "Eligible Advisers", "lines": candidate_lines},
-                        {"header": "Selected Adviser", "lines": selected_section},
-                    ],
-                )
+                # The card is only worth building when it will actually be sent
                 if send_chat_alert_flag:
-                    send_chat_alert(payload)
+                    send_chat_alert(
+                        _allocation_chat_card(
+                            deal_id,
+                            deal_service_display,
+                            deal_household_display,
+                            adviser_name,
+                            chosen_email,
+                            adviser_service_tags,
+                            adviser_household_tags,
+                            candidate_list,
+                        )
+                    )
                     logger.info("Chat alert flag=%s", send_chat_alert_flag)
                 else:
                     logger.info("Skipping chat alert for deal %s due to request flag", deal_id)
@@ -333,29 +367,14 @@ def handle_allocation():
                 store_allocation_record(
                     None,
                     {
-                        "client_email": fields.get("client_email", ""),
-                        "adviser_email": chosen_email,
-                        "adviser_name": adviser_name,
-                        "adviser_hubspot_id": hubspot_owner_id,
-                        "adviser_service_packages": adviser_service_tags,
-                        "adviser_household_types": adviser_household_tags,
-                        "deal_id": deal_id,
-                        "service_package": deal_service_display,
-                        "service_package_raw": service_package,
-                        "household_type": deal_household_display,
-                        "household_type_raw": household_type,
-                        "agreement_start_date": agreement_start_display,
-                        "agreement_start_raw": agreement_start_date,
+                        **allocation_fields,
                         "allocation_result": "failed",
                         "status": "failed",
                         "error_message": str(http_err),
                     },
                     source="hubspot_webhook",
                     raw_request=event,
-                    extra_fields={
-                        "ip_address": request.remote_addr,
-                        "user_agent": request.headers.get("User-Agent", ""),
-                    },
+                    extra_fields=request_fields,
                 )
 
             except Exception as err:
@@ -364,57 +383,15 @@ def handle_allocation():
                 store_allocation_record(
                     None,
                     {
-                        "client_email": fields.get("client_email", ""),
-                        "adviser_email": chosen_email if chosen_email else "",
-                        "adviser_name": adviser_name if "adviser_name" in locals() else "",
-                        "adviser_hubspot_id": (
-                            hubspot_owner_id if "hubspot_owner_id" in locals() else ""
-                        ),
-                        "adviser_service_packages": (
-                            adviser_service_tags if "adviser_service_tags" in locals() else []
-                        ),
-                        "adviser_household_types": (
-                            adviser_household_tags if "adviser_household_tags" in locals() else []
-                        ),
-                        "deal_id": deal_id if "deal_id" in locals() else "",
-                        "service_package": (
-                            deal_service_display
-                            if "deal_service_display" in locals()
-                            else (service_package if "service_package" in locals() else "")
-                        ),
-                        "service_package_raw": (
-                            service_package if "service_package" in locals() else ""
-                        ),
-                        "household_type": (
-                            deal_household_display
-                            if "deal_household_display" in locals()
-                            else (household_type if "household_type" in locals() else "")
-                        ),
-                        "household_type_raw": (
-                            household_type if "household_type" in locals() else ""
-                        ),
-                        "agreement_start_date": (
-                            agreement_start_display
-                            if "agreement_start_display" in locals()
-                            else (
-                                format_agreement_start(agreement_start_date)
-                                if "agreement_start_date" in locals()
-                                else ""
-                            )
-                        ),
-                        "agreement_start_raw": (
-                            agreement_start_date if "agreement_start_date" in locals() else ""
-                        ),
+                        **allocation_fields,
+                        "adviser_email": chosen_email or "",
                         "allocation_result": "failed",
                         "status": "failed",
                         "error_message": str(err),
                     },
                     source="hubspot_webhook",
                     raw_request=event,
-                    extra_fields={
-                        "ip_address": request.remote_addr,
-                        "user_agent": request.headers.get("User-Agent", ""),
-                    },
+                    extra_fields=request_fields,
                 )
 
         logger.info(
@@ -500,6 +477,7 @@ def handle_calendar_notification():
 
         cloudsql_db = get_cloudsql_db()
         result = sync_calendar_closures(calendar_sources=sources, db=cloudsql_db)
+        refresh_global_closure_cache()
         _last_calendar_sync_utc = now_utc
 
         logger.info("Calendar webhook sync complete: %s", result)
@@ -1,14 +1,17 @@
 import logging
 import os
 import re
+import threading
 import time
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 import requests
 from cachetools import TTLCache
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
 from adviser_allocation.utils.common import (
     SYDNEY_TZ,
@@ -17,12 +20,40 @@ from adviser_allocation.utils.common import (
     sydney_now,
     sydney_today,
 )
+from adviser_allocation.utils.http_client import (
+    create_session_with_retries,
+    pace_hubspot_rate_limit,
+)
 from adviser_allocation.utils.secrets import get_secret
 
 logger = logging.getLogger(__name__)
 
-HUBSPOT_TOKEN = get_secret("HUBSPOT_TOKEN")
-HEADERS = {"Authorization": f"Bearer {HUBSPOT_TOKEN}", "Content-Type": "application/json"}
+
+@lru_cache(maxsize=1)
+def _hubspot_token() -> Optional[str]:
+    """Return the HubSpot private app token, resolved on first use.
+
+    The token can be a Secret Manager reference, so looking it up at import
+    would put that round trip on every worker's cold start.
+    """
+    return get_secret("HUBSPOT_TOKEN")
+
+
+def _require_hubspot_token() -> str:
+    token = _hubspot_token()
+    if not token:
+        raise RuntimeError("HUBSPOT_TOKEN is not configured")
+    return token
+
+
+class _HubSpotBearerAuth(requests.auth.AuthBase):
+    """Attach the lazily resolved HubSpot token to each request."""
+
+    def __call__(self, r):
+        r.headers["Authorization"] = f"Bearer {_hubspot_token()}"
+        return r
+
+
 _SPECIAL_UPPER = {"ipo"}
 PRESTART_WEEKS = int(os.environ.get("PRESTART_WEEKS", "3"))
 # Fetch fresh data from HubSpot every time (set to 0 to disable caching)
@@ -56,16 +87,19 @@ def _parse_iso_date(value: str) -> Optional[date]:
 
 
 _capacity_override_ttl_cache: TTLCache = TTLCache(maxsize=1, ttl=300)
+# Advisers are analysed on worker threads; the lock keeps a cold cache from
+# being loaded once per thread and guards the (non thread-safe) TTLCache.
+_capacity_override_lock = threading.Lock()
 
 
 def _capacity_override_cache() -> Dict[str, List[Dict]]:
     """Cache adviser capacity overrides grouped by email (5-minute TTL)."""
-    cached = _capacity_override_ttl_cache.get("overrides")
-    if cached is not None:
+    with _capacity_override_lock:
+        cached = _capacity_override_ttl_cache.get("overrides")
+        if cached is None:
+            cached = _capacity_override_cache_load()
+            _capacity_override_ttl_cache["overrides"] = cached
         return cached
-    result = _capacity_override_cache_load()
-    _capacity_override_ttl_cache["overrides"] = result
-    return result
 
 
 def _capacity_override_cache_load() -> Dict[str, List[Dict]]:
@@ -110,7 +144,103 @@ def _capacity_override_cache_load() -> Dict[str, List[Dict]]:
 
 def refresh_capacity_override_cache() -> None:
     """Clear the cached overrides; used after admin updates."""
-    _capacity_override_ttl_cache.clear()
+    with _capacity_override_lock:
+        _capacity_override_ttl_cache.clear()
+
+
+# Office closures are the same for every adviser and change a few times a
+# year, so the classified weeks are shared across requests for five minutes.
+_global_closure_ttl_cache: TTLCache = TTLCache(maxsize=1, ttl=300)
+_global_closure_lock = threading.Lock()
+
+
+def get_global_closure_weeks(db) -> List[List[int]]:
+    """Return office closures as [week, weekdays closed] pairs (5-minute TTL)."""
+    with _global_closure_lock:
+        cached = _global_closure_ttl_cache.get("closures")
+        if cached is None:
+            cached = classify_leave_weeks(db.get_global_closure_ranges(), as_days=True)
+            _global_closure_ttl_cache["closures"] = cached
+        return cached
+
+
+def refresh_global_closure_cache() -> None:
+    """Clear the cached office closures; used after closure edits and syncs."""
+    with _global_closure_lock:
+        _global_closure_ttl_cache.clear()
+
+
+# Employee IDs only change on an EH employee sync and leave on the order of
+# days, so warm instances can skip most CloudSQL round-trips. Both caches are
+# cleared by refresh_employee_cache() whenever the EH sync writes new data.
+# That only clears the instance that ran the sync, so not-found emails are
+# kept for a minute rather than an hour and newly synced advisers show up
+# on every instance soon after.
+_employee_id_ttl_cache: TTLCache = TTLCache(maxsize=512, ttl=3600)
+_employee_id_miss_ttl_cache: TTLCache = TTLCache(maxsize=512, ttl=60)
+_employee_leaves_ttl_cache: TTLCache = TTLCache(maxsize=512, ttl=600)
+_employee_cache_lock = threading.Lock()
+
+
+def refresh_employee_cache() -> None:
+    """Clear cached employee IDs and leave; used after EH syncs."""
+    with _employee_cache_lock:
+        _employee_id_ttl_cache.clear()
+        _employee_id_miss_ttl_cache.clear()
+        _employee_leaves_ttl_cache.clear()
+
+
+def _employee_ids_for_emails(db, emails: List[str]) -> Dict[str, Optional[str]]:
+    """Return email -> EH employee ID, querying CloudSQL only for uncached emails."""
+    result: Dict[str, Optional[str]] = {}
+    missing = []
+    with _employee_cache_lock:
+        for email in emails:
+            if email in _employee_id_ttl_cache:
+                result[email] = _employee_id_ttl_cache[email]
+            elif email in _employee_id_miss_ttl_cache:
+                result[email] = None
+            else:
+                missing.append(email)
+    if missing:
+        fetched = db.get_employee_ids_by_emails(missing)
+        with _employee_cache_lock:
+            for email in missing:
+                result[email] = fetched.get(email)
+                if result[email] is None:
+                    _employee_id_miss_ttl_cache[email] = True
+                else:
+                    _employee_id_ttl_cache[email] = result[email]
+    return result
+
+
+def _employee_leaves(db, employee_id: Optional[str]) -> List[Dict]:
+    """Return cached leave date ranges for an EH employee ID."""
+    if not employee_id:
+        return []
+    with _employee_cache_lock:
+        cached = _employee_leaves_ttl_cache.get(employee_id)
+    if cached is None:
+        cached = db.get_employee_leave_ranges(employee_id)
+        with _employee_cache_lock:
+            _employee_leaves_ttl_cache[employee_id] = cached
+    return list(cached)
+
+
+def _prefetch_employee_leaves(db, employee_ids) -> None:
+    """Warm the leave cache for every uncached employee with one query."""
+    with _employee_cache_lock:
+        missing = [
+            emp_id
+            for emp_id in dict.fromkeys(employee_ids)
+            if emp_id and emp_id not in _employee_leaves_ttl_cache
+        ]
+    if not missing:
+        return
+    fetched = db.get_leave_ranges_by_employee_ids(missing)
+    with _employee_cache_lock:
+        for emp_id in missing:
+            _employee_leaves_ttl_cache[emp_id] = fetched.get(emp_id, [])
 
 
 def _capacity_schedule_for_email(email: str) -> List[Dict]:
@@ -179,33 +309,36 @@ def weekly_capacity_target(user: dict, week_ordinal: int) -> int:
     return int(monthly_limit / 2)
 
 
-def create_requests_session():
-    """Create a requests session with retry logic for network issues."""
-    session = requests.Session()
-
-    # Define retry strategy
-    retry_strategy = Retry(
-        total=3,  # Total number of retries
-        status_forcelist=[429, 500, 502, 503, 504],  # HTTP status codes to retry on
-        allowed_methods=[
-            "HEAD",
-            "GET",
-            "POST",
-            "PUT",
-            "DELETE",
-            "OPTIONS",
-            "TRACE",
-        ],  # Updated parameter name
-        backoff_factor=1,  # Wait time between retries (1, 2, 4 seconds)
-        raise_on_status=False,
-    )
+def _weekly_capacity_targets(user: dict, weeks) -> list[int]:
+    """Return ``weekly_capacity_target`` for each of the ascending ``weeks``.
 
-    # Mount the adapter to both HTTP and HTTPS
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-
-    return session
+    Walks the override schedule once alongside the weeks instead of
+    rescanning it for every week.
+    """
+    limit = int(
+        user.get("_base_client_limit_monthly")
+        or (user.get("properties", {}).get("client_limit_monthly") or 0)
+    )
+    schedule = user.get("capacity_override_schedule") or []
+    position = 0
+    targets = []
+    for week_ordinal in weeks:
+        while position < len(schedule) and schedule[position]["effective_week"] <= week_ordinal:
+            limit = schedule[position]["client_limit_monthly"]
+            position += 1
+        monthly_limit = int(limit)
+        targets.append(int(monthly_limit / 2) if monthly_limit > 0 else 0)
+    return targets
+
+
+# Shared HubSpot session: keeps TLS connections to api.hubapi.com alive across
+# the per-adviser calls instead of re-handshaking on every request.
+HUBSPOT_SESSION = create_session_with_retries(
+    retries=3, backoff_factor=1, raise_on_status=False, pool_connections=4, pool_maxsize=32
+)
+HUBSPOT_SESSION.headers["Content-Type"] = "application/json"
+HUBSPOT_SESSION.auth = _HubSpotBearerAuth()
+HUBSPOT_SESSION.hooks["response"].append(pace_hubspot_rate_limit)
 
 
 CLARIFY_COL = 0
@@ -216,14 +349,34 @@ TARGET_CAPACITY_COL = 4
 ACTUAL_CAPACITY_COL = 5
 DIFFERENCE_COL = 6
 
+# Upper bound on advisers processed concurrently. HubSpot's CRM search API is
+# rate limited per token, so keep this modest; 429s are retried by the session.
+ADVISER_FANOUT_WORKERS = int(os.environ.get("ADVISER_FANOUT_WORKERS", "4"))
+
 # Days in a fortnight (used when stepping weeks by ordinals)
 FORTNIGHT_DAYS = 14
 WEEKLY_HARD_LIMIT = 2  # maximum number of clarifies that can be allocated in a single week
 
 
-def _prev_week(week_key: int) -> int:
-    """Return the Monday ordinal of the previous week for a given week key."""
-    return week_key - 7
+def _map_advisers(func, items):
+    """Apply ``func`` to each item on a bounded thread pool, preserving order."""
+    if ADVISER_FANOUT_WORKERS <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(ADVISER_FANOUT_WORKERS, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def _run_concurrently(*calls):
+    """Run independent zero-argument callables together and return their results in order.
+
+    Used to overlap the batched HubSpot searches with the CloudSQL lookups
+    instead of waiting on each round trip in turn.
+    """
+    if ADVISER_FANOUT_WORKERS <= 1 or len(calls) <= 1:
+        return [call() for call in calls]
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
 
 
 def _get_col(data, week_key: int, col_index: int, default: int = 0) -> int:
@@ -232,7 +385,11 @@ def _get_col(data, week_key: int, col_index: int, default: int = 0) -> int:
     Falls back to `default` if the week is missing or the column index
     does not exist for that week.
     """
-    row = data.get(week_key, [])
+    return _row_col(data.get(week_key, ()), col_index, default)
+
+
+def _row_col(row, col_index: int, default: int = 0) -> int:
+    """Integer column value from an already fetched capacity row, or `default`."""
     try:
         return int(row[col_index]) if len(row) > col_index else default
     except Exception:
@@ -241,10 +398,8 @@ def _get_col(data, week_key: int, col_index: int, default: int = 0) -> int:
 
 def _first_index_at_or_after(weeks_sorted, min_week_key: int):
     """Return the index of the first week >= min_week_key in the sorted list."""
-    for idx, wk in enumerate(weeks_sorted):
-        if wk >= min_week_key:
-            return idx
-    return None
+    idx = bisect_left(weeks_sorted, min_week_key)
+    return idx if idx < len(weeks_sorted) else None
 
 
 def _is_full_ooo_week(data, week_key: int) -> bool:
@@ -255,32 +410,27 @@ def _is_full_ooo_week(data, week_key: int) -> bool:
     return False
 
 
-def _find_next_non_full_ooo_week(data, sorted_weeks, start_week: int) -> int:
-    """Find the next week that doesn't have Full OOO status."""
-    start_idx = _first_index_at_or_after(sorted_weeks, start_week)
-    if start_idx is None:
-        return start_week
+def _next_non_full_ooo_weeks(data, sorted_weeks) -> list:
+    """For each index, the first week at or after it without Full OOO status.
 
-    for i in range(start_idx, len(sorted_weeks)):
+    Built in one backward pass so callers walking the weeks don't search
+    forward over runs of Full weeks each time. When every remaining week is
+    Full OOO, the entry is the week after the last one.
+    """
+    next_weeks = [0] * len(sorted_weeks)
+    following = sorted_weeks[-1] + 7 if sorted_weeks else 0
+    for i in range(len(sorted_weeks) - 1, -1, -1):
         week = sorted_weeks[i]
         if not _is_full_ooo_week(data, week):
-            return week
-
-    # If all remaining weeks are Full OOO, return the last week + 7 days
-    return sorted_weeks[-1] + 7 if sorted_weeks else start_week
+            following = week
+        next_weeks[i] = following
+    return next_weeks
 
 
 def _find_prev_non_full_ooo_week(data, sorted_weeks, start_week: int) -> int:
     """Find the previous week that doesn't have Full OOO status."""
-    # Find the index of start_week or the closest week before it
-    start_idx = None
-    for i, week in enumerate(sorted_weeks):
-        if week >= start_week:
-            start_idx = i
-            break
-
-    if start_idx is None:
-        start_idx = len(sorted_weeks)
+    # Index of the first week >= start_week (len when all weeks are earlier)
+    start_idx = bisect_left(sorted_weeks, start_week)
 
     # Look backwards from start_idx
     for i in range(start_idx - 1, -1, -1):
@@ -292,6 +442,37 @@ def _find_prev_non_full_ooo_week(data, sorted_weeks, start_week: int) -> int:
     return sorted_weeks[0] - 7 if sorted_weeks else start_week - 7
 
 
+CAPACITY_SHARE_FULL = "full"
+CAPACITY_SHARE_HALF = "half"
+CAPACITY_SHARE_NONE = "none"
+
+
+@lru_cache(maxsize=64)
+def _leave_capacity_share(status) -> str:
+    """Return how much of the weekly target a leave status leaves available.
+
+    Statuses are a handful of literals ("No", "Full", "Partial: N"), so each
+    distinct value is classified once and memoised.
+    """
+    status_value = status.strip() if isinstance(status, str) else ""
+    status_lower = (status_value or "No").lower()
+    if status_lower == "no":
+        return CAPACITY_SHARE_FULL
+    if status_lower == "full":
+        return CAPACITY_SHARE_NONE
+    if status_lower.startswith("partial"):
+        try:
+            partial_days = int(status_value.split(":")[1].strip())
+        except Exception:
+            partial_days = None
+        if partial_days is not None:
+            return CAPACITY_SHARE_HALF if partial_days in (3, 4) else CAPACITY_SHARE_FULL
+    # Unrecognised status mentioning 1-4 days is treated as a partial week
+    if any(ch in status_value for ch in "1234"):
+        return CAPACITY_SHARE_HALF
+    return CAPACITY_SHARE_FULL
+
+
 def ceil_div(a, b):
     return -(-a // b)  # integer ceil without math.ceil
 
@@ -319,141 +500,198 @@ def get_monday_from_weeks_ago(input_date=None, n=1):
     # Calculate the date for the Monday of the week two workweeks ago
     two_workweeks_ago_start = current_week_start - timedelta(weeks=n)
 
-    # Convert the date to a datetime object at midnight (start of the day) in Sydney timezone
-    start_of_day_two_workweeks_ago = sydney_datetime_from_date(two_workweeks_ago_start)
-
-    # Convert the datetime object to a Unix timestamp in milliseconds
-    timestamp_milliseconds = int(start_of_day_two_workweeks_ago.timestamp() * 1000)
+    return _sydney_midnight_milliseconds(two_workweeks_ago_start)
 
-    return timestamp_milliseconds
 
+@lru_cache(maxsize=64)
+def _sydney_midnight_milliseconds(day: date) -> int:
+    """Unix timestamp in milliseconds for midnight Sydney time on ``day``.
 
-def get_user_meeting_details(user, timestamp_milliseconds):
-    """
-    returns details of user meetings from input timestamp
+    The result only changes when the Monday does, so a week's calls share one
+    timezone conversion.
     """
+    return int(sydney_datetime_from_date(day).timestamp() * 1000)
 
-    url = "https://api.hubapi.com/crm/v3/objects/meetings/search"
 
-    user_id = user["properties"]["hubspot_owner_id"]
-    payload = {
+MEETINGS_SEARCH_URL = "https://api.hubapi.com/crm/v3/objects/meetings/search"
+DEALS_SEARCH_URL = "https://api.hubapi.com/crm/v3/objects/deals/search"
+CLARIFY_ACTIVITY = "Clarify"
+KICKOFF_ACTIVITY = "Kick Off"
+_MEETING_ACTIVITIES = frozenset((CLARIFY_ACTIVITY, KICKOFF_ACTIVITY))
+# HubSpot caps the number of values accepted by a single IN filter
+HUBSPOT_IN_FILTER_LIMIT = 100
+
+
+def _chunked(values: list, size: int):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _hubspot_search_all(url: str, payload: dict) -> list:
+    """Return every result of a CRM search, following ``paging.next.after``."""
+    body = dict(payload)
+    results = []
+    while True:
+        response = HUBSPOT_SESSION.post(url, json=body, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        results.extend(data.get("results", []))
+        after = ((data.get("paging") or {}).get("next") or {}).get("after")
+        if not after:
+            return results
+        body["after"] = after
+
+
+# Meeting properties read by get_meeting_count and the owner bucketing; the
+# title and outcome are only requested when meetings are shown to a user.
+MEETING_COUNT_PROPERTIES = ("hs_meeting_start_time", "hubspot_owner_id", "hs_activity_type")
+MEETING_DISPLAY_PROPERTIES = ("hs_meeting_title", "hs_meeting_outcome", *MEETING_COUNT_PROPERTIES)
+
+
+# Parts of the meetings search that never vary between calls; payloads only
+# splice in the owner filter and the start timestamp. Treat as read-only.
+_MEETING_ACTIVITY_FILTER = {
+    "propertyName": "hs_activity_type",
+    "operator": "IN",
+    "values": [CLARIFY_ACTIVITY, KICKOFF_ACTIVITY],
+}
+_MEETING_SEARCH_SORTS = [{"propertyName": "hs_meeting_start_time", "direction": "DESCENDING"}]
+
+
+def _meeting_search_payload(
+    owner_filter: dict, timestamp_milliseconds, properties=MEETING_COUNT_PROPERTIES
+) -> dict:
+    """Build the Clarify/Kick Off meetings search for the given owner filter."""
+    return {
         "filterGroups": [
             {
                 "filters": [
-                    {
-                        "propertyName": "hubspot_owner_id",
-                        "operator": "EQ",
-                        "value": f"{user_id}",
-                        # 250884516 - sturman
-                    },
+                    owner_filter,
                     {
                         "propertyName": "hs_meeting_start_time",
                         "operator": "GTE",
                         "value": f"{timestamp_milliseconds}",
                     },
-                    {
-                        "propertyName": "hs_activity_type",
-                        "operator": "IN",
-                        "values": ["Clarify", "Kick Off"],
-                    },
-                    # {
-                    #     "propertyName": "hs_object_id",
-                    #     "operator": "EQ",
-                    #     "value": "41467563648", # deal id of shane sample
-                    # },
+                    _MEETING_ACTIVITY_FILTER,
                 ]
             }
         ],
-        "properties": [
-            "hs_meeting_title",
-            "hs_meeting_start_time",
-            # "hs_meeting_end_time",
-            # "hs_meeting_location",
-            # "hs_meeting_body",
-            "hs_meeting_outcome",
-            "hubspot_owner_id",
-            "hs_activity_type",
-        ],
-        "sorts": [{"propertyName": "hs_meeting_start_time", "direction": "DESCENDING"}],
+        "properties": list(properties),
+        "sorts": _MEETING_SEARCH_SORTS,
         "limit": 100,
     }
-    if not HUBSPOT_TOKEN:
-        raise RuntimeError("HUBSPOT_TOKEN is not configured")
 
-    session = create_requests_session()
+
+def get_user_meeting_details(user, timestamp_milliseconds, full=False):
+    """
+    returns details of user meetings from input timestamp
+
+    Only the properties needed to count meetings are requested unless
+    ``full`` is set, which adds the title and outcome for display.
+    """
+    user_id = user["properties"]["hubspot_owner_id"]
+    payload = _meeting_search_payload(
+        {"propertyName": "hubspot_owner_id", "operator": "EQ", "value": f"{user_id}"},
+        timestamp_milliseconds,
+        MEETING_DISPLAY_PROPERTIES if full else MEETING_COUNT_PROPERTIES,
+    )
+    _require_hubspot_token()
+
     try:
-        result = session.post(url, headers=HEADERS, json=payload, timeout=30)
+        result = HUBSPOT_SESSION.post(MEETINGS_SEARCH_URL, json=payload, timeout=30)
         result.raise_for_status()
         user["meetings"] = result.json()
-        time.sleep(0.005)
     except requests.exceptions.RequestException as e:
-        logging.warning(f"Failed to fetch meetings for user: {e}")
+        logger.warning("Failed to fetch meetings for user: %s", e)
         user["meetings"] = {"results": []}  # Fallback to empty results
-    finally:
-        session.close()
 
     return user
 
 
-def get_meeting_count(user_meetings, display_table=False):
-    # Dictionary to store meeting counts per week
-    weekly_clarify_counts = {}
-    weekly_kickoff_counts = {}
-
-    # user_meetings = get_user_meeting_details(user_id, input_date)
-    # print(user_meetings)
-
-    for meeting in user_meetings:
-        # Extract the meeting start time string
-        start_time_str = meeting["properties"]["hs_meeting_start_time"]
-
-        # Convert the ISO 8601 string to a datetime object
-        # The 'Z' indicates UTC, so .fromisoformat() handles it.
-        meeting_datetime = datetime.fromisoformat(start_time_str.replace("Z", "+00:00"))
+def get_users_meeting_details(users, timestamp_milliseconds):
+    """Attach meetings to each user using owner-batched, paged searches.
 
-        # Get the ISO week number (1 to 52 or 53)
-        # isocalendar() returns a tuple (year, week, weekday)
-        week_number = week_monday_ordinal(meeting_datetime.date())
+    Issues one search per ``HUBSPOT_IN_FILTER_LIMIT`` owners instead of one per
+    adviser, then buckets results by ``hubspot_owner_id``. Users in a batch
+    that fails get no meetings and a ``meetings_error`` message, so callers
+    can report the failure or retry with get_user_meeting_details.
+    """
+    _require_hubspot_token()
 
-        # Check if the activity type is 'Kick Off' and increment its specific count
-        if meeting["properties"]["hs_activity_type"] == "Kick Off":
-            weekly_kickoff_counts[week_number] = weekly_kickoff_counts.get(week_number, 0) + 1
+    owner_ids = list(
+        dict.fromkeys(
+            str(u["properties"]["hubspot_owner_id"])
+            for u in users
+            if u["properties"].get("hubspot_owner_id")
+        )
+    )
+    meetings_by_owner: Dict[str, list] = {}
+    failed_owners: Dict[str, str] = {}
+    for owner_batch in _chunked(owner_ids, HUBSPOT_IN_FILTER_LIMIT):
+        payload = _meeting_search_payload(
+            {"propertyName": "hubspot_owner_id", "operator": "IN", "values": owner_batch},
+            timestamp_milliseconds,
+        )
+        try:
+            results = _hubspot_search_all(MEETINGS_SEARCH_URL, payload)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Failed to fetch meetings for %d owners: %s", len(owner_batch), e)
+            failed_owners.update(dict.fromkeys(owner_batch, f"Failed to fetch meetings: {e}"))
+            continue
+        for meeting in results:
+            owner_id = str((meeting.get("properties") or {}).get("hubspot_owner_id"))
+            meetings_by_owner.setdefault(owner_id, []).append(meeting)
 
-        # Check if the activity type is 'Clarify' and increment its specific count
-        if meeting["properties"]["hs_activity_type"] == "Clarify":
-            weekly_clarify_counts[week_number] = weekly_clarify_counts.get(week_number, 0) + 1
+    for user in users:
+        owner_id = str(user["properties"].get("hubspot_owner_id"))
+        user["meetings"] = {"results": meetings_by_owner.get(owner_id, [])}
+        if owner_id in failed_owners:
+            user["meetings_error"] = failed_owners[owner_id]
+    return users
 
-        # print(week_number, meeting['properties']['hs_meeting_start_time'], meeting['properties']['hs_activity_type'], meeting['properties']['hs_meeting_title'])
 
-    # Prepare data for the table
-    # Get all unique week numbers from both dictionaries
-    all_weeks = sorted(list(set(weekly_clarify_counts.keys()).union(weekly_kickoff_counts.keys())))
+def get_meeting_count(user_meetings, display_table=False):
+    # Count meetings per (day, activity type) first, then fold the distinct days
+    # into weeks so each date is parsed once rather than once per meeting. The
+    # start time is an ISO 8601 string, so its first 10 characters are the date
+    # the meeting falls on in the string's own offset (UTC for HubSpot's "Z").
+    day_counts = Counter(
+        (props["hs_meeting_start_time"][:10], props["hs_activity_type"])
+        for props in (meeting["properties"] for meeting in user_meetings)
+        if props["hs_activity_type"] in _MEETING_ACTIVITIES
+    )
+    counts = Counter()
+    for (day, activity_type), n in day_counts.items():
+        counts[week_monday_ordinal(date.fromisoformat(day)), activity_type] += n
 
-    table_data = [["Week", "Clarify Meetings", "Kick Off Meetings"]]
-    for week in all_weeks:
-        total_count = weekly_clarify_counts.get(week, 0)
-        kickoff_count = weekly_kickoff_counts.get(week, 0)
-        table_data.append([week_label_from_ordinal(week), total_count, kickoff_count])
+    all_weeks = sorted({week for week, _ in counts})
 
     # Optionally log the table for debugging
     if display_table:
-        lines = []
-        for row in table_data:
-            if row == table_data[0]:
-                lines.append(f"{row[0]:<15} {row[1]:<16} {row[2]}")
-                lines.append("-" * 50)
-            else:
-                lines.append(f"{row[0]:<15} {row[1]:<16} {row[2]}")
+        lines = [f"{'Week':<15} {'Clarify Meetings':<16} Kick Off Meetings", "-" * 50]
+        for week in all_weeks:
+            lines.append(
+                f"{week_label_from_ordinal(week):<15} "
+                f"{counts[week, CLARIFY_ACTIVITY]:<16} {counts[week, KICKOFF_ACTIVITY]}"
+            )
         logger.debug("Meeting count table:\n%s", "\n".join(lines))
 
-    return {
-        w: [weekly_clarify_counts.get(w, 0), weekly_kickoff_counts.get(w, 0)] for w in all_weeks
-    }
+    return {w: [counts[w, CLARIFY_ACTIVITY], counts[w, KICKOFF_ACTIVITY]] for w in all_weeks}
 
 
-def get_user_client_limits(user, tenure_limit=90):
+@lru_cache(maxsize=4096)
+def _parse_iso_day(value: str) -> date:
+    """Parse an ISO date or datetime string to its date.
+
+    Adviser start dates, leave ranges and deal agreement dates repeat heavily
+    across advisers and runs, so each distinct string is parsed once.
+    """
+    return datetime.fromisoformat(value).date()
+
+
+def get_user_client_limits(user, tenure_limit=90, today=None):
     props = user.setdefault("properties", {})
-    date_today = sydney_today()
+    date_today = today or sydney_today()
     props["client_limit_monthly"] = 6  # monthly
 
     start_date_str = props.get("adviser_start_date")
@@ -461,7 +699,7 @@ def get_user_client_limits(user, tenure_limit=90):
 
     try:
         if start_date_str:
-            start_date = datetime.fromisoformat(start_date_str).date()
+            start_date = _parse_iso_day(start_date_str)
             # Adjust capacity based on pod type only (no tenure-based reduction)
             if pod_type == "Solo Adviser":
                 props["client_limit_monthly"] = 4
@@ -473,18 +711,45 @@ def get_user_client_limits(user, tenure_limit=90):
             else:
                 user["availability_start_week"] = None
     except Exception as e:
-        logging.warning(f"Failed to parse adviser_start_date '{start_date_str}': {e}")
+        logger.warning("Failed to parse adviser_start_date '%s': %s", start_date_str, e)
         user["availability_start_week"] = None
 
     return _apply_capacity_overrides(user)
 
 
-def classify_leave_weeks(leave_requests):
+# Leave label for each weekday count 0-5. Rows share these strings instead of
+# formatting a new label per week.
+LEAVE_LABELS = ("No", "Partial: 1", "Partial: 2", "Partial: 3", "Partial: 4", "Full")
+
+
+@lru_cache(maxsize=4096)
+def _leave_range_week_days(start_date_str: str, end_date_str: str) -> tuple:
+    """Return ``(week_key, weekdays)`` pairs for the weeks a leave range touches.
+
+    Weekdays are counted by clipping each Mon-Fri block to the range, a week
+    at a time. Leave and closures are re-read on every allocation, so each
+    distinct range is only worked out once.
+    """
+    start = _parse_iso_day(start_date_str)
+    start_ord = start.toordinal()
+    end_ord = _parse_iso_day(end_date_str).toordinal()
+    week_days = []
+    for week_key in range(start_ord - start.weekday(), end_ord + 1, 7):
+        days_count = min(end_ord, week_key + 4) - max(start_ord, week_key) + 1
+        if days_count > 0:
+            week_days.append((week_key, days_count))
+    return tuple(week_days)
+
+
+def classify_leave_weeks(leave_requests, as_days=False):
     """
     Classifies the weeks for a list of leave requests as 'Full' or 'Partial'.
 
     Args:
         leave_requests (list): A list of dictionaries, where each dict is a leave request.
+        as_days (bool): Return the weekday count (1-5) instead of its label. This
+            is what get_merged_schedule accumulates, so the allocation pipelines
+            skip formatting and re-parsing the labels.
 
     Returns:
         list: A flattened list of lists, with each inner list containing the
@@ -499,27 +764,31 @@ def classify_leave_weeks(leave_requests):
             continue
 
         try:
-            start = datetime.fromisoformat(start_date_str).date()
-            end = datetime.fromisoformat(end_date_str).date()
+            week_days = _leave_range_week_days(start_date_str, end_date_str)
         except ValueError:
             continue
 
-        current_date = start
-        weeks_activity = {}
+        for week_key, days_count in week_days:
+            classification = days_count if as_days else LEAVE_LABELS[days_count]
+            all_classified_weeks.append([week_key, classification])
 
-        while current_date <= end:
-            if 0 <= current_date.weekday() <= 4:
-                week_key = week_monday_ordinal(current_date)
-                weeks_activity[week_key] = weeks_activity.get(week_key, 0) + 1
+    return all_classified_weeks
 
-            current_date += timedelta(days=1)
 
-        # Classify each week and append to the main list
-        for week_key, days_count in weeks_activity.items():
-            classification = "Full" if days_count == 5 else f"Partial: {days_count}"
-            all_classified_weeks.append([week_key, classification])
+@lru_cache(maxsize=64)
+def _classification_days(classification: str) -> int:
+    """Number of leave days a week classification ("Full", "Partial: N", "No") represents.
 
-    return all_classified_weeks
+    Day counts from ``classify_leave_weeks(..., as_days=True)`` pass straight through.
+    """
+    if isinstance(classification, int):
+        return classification
+    if classification == "Full":
+        return 5
+    if not classification or classification == "No":
+        return 0
+    match = re.search(r"(\d+)", str(classification))
+    return int(match.group(1)) if match else 0
 
 
 def get_merged_schedule(user):
@@ -532,74 +801,30 @@ def get_merged_schedule(user):
     classified_deals = user["deals_no_clarify_list"]
     data_dict = user["meeting_count_list"]
 
-    # Create maps for fast lookup of classified weeks
-    def classification_days(c: str) -> int:
-        if c == "Full":
-            return 5
-        if not c or c == "No":
-            return 0
-        try:
-            match = re.search(r"(\d+)", str(c))
-            if match:
-                return int(match.group(1))
-        except Exception:
-            return 0
-        return 0
-
-    def combine_classification(a: str, b: str) -> str:
-        days = min(5, classification_days(a) + classification_days(b))
-        if days >= 5:
-            return "Full"
-        if days > 0:
-            return f"Partial: {days}"
-        return "No"
-
-    classified_weeks_map: Dict[int, str] = {}
+    # Accumulate leave days per week as integers (capped at a full week) and
+    # only render the "Full"/"Partial: N"/"No" label once per merged row.
+    leave_days: Dict[int, int] = {}
     for week_num, classification in classified_weeks:
-        existing = classified_weeks_map.get(week_num, "No")
-        classified_weeks_map[week_num] = combine_classification(existing, classification)
+        days = leave_days.get(week_num, 0) + _classification_days(classification)
+        leave_days[week_num] = min(5, days)
 
-    global_weeks_map: Dict[int, str] = {}
+    global_days: Dict[int, int] = {}
     for week_num, classification in global_weeks:
-        existing = global_weeks_map.get(week_num, "No")
-        global_weeks_map[week_num] = combine_classification(existing, classification)
-
-    # Step 1: Merge classified leave weeks into data_dict
-    for week_num, values in data_dict.items():
-        base_cls = classified_weeks_map.get(week_num, "No")
-        glob_cls = global_weeks_map.get(week_num, "No")
-        classification = combine_classification(base_cls, glob_cls)
-        data_dict[week_num].append(classification)
-
-    # Step 2: Add new entries for weeks that are in classified_weeks but not in data_dict
-    for week_num, classification in classified_weeks_map.items():
-        if week_num not in data_dict:
-            # We add a 'No' for the deals classification as it's not available here
-            glob_cls = global_weeks_map.get(week_num, "No")
-            data_dict[week_num] = [0, 0, combine_classification(classification, glob_cls)]
-    # Also add entries for global-only weeks
-    for week_num, gclassification in global_weeks_map.items():
-        if week_num not in data_dict:
-            data_dict[week_num] = [0, 0, combine_classification("No", gclassification)]
-            # Since classified_deals is now a dictionary, it's simpler to handle the merge separately below.
-
-    # Step 3: Merge classified deals (now a dictionary of counts) into the data_dict
-    # First, process the weeks that are already in data_dict
-    for week_num, values in data_dict.items():
-        # Retrieve the count for the week from the classified_deals dictionary
-        # The .get() method is used to return a default of [0] if the key is not found
-        deals_count_list = classified_deals.get(week_num, [0])
-
-        # add 2 weeks to agreement start date
-        values.append(deals_count_list[0])
-
-    # Step 4: Add new entries for weeks that are in classified_deals but not in data_dict
-    for week_num, count_list in classified_deals.items():
-        if week_num not in data_dict:
-            # Create a new entry with default values for other columns
-            data_dict[week_num] = [0, 0, "No", count_list[0]]
-
-    user["merged_schedule"] = data_dict
+        days = global_days.get(week_num, 0) + _classification_days(classification)
+        global_days[week_num] = min(5, days)
+
+    # Build every row once over the union of weeks seen in any source:
+    # [clarify, kickoff, leave classification, deals without clarify]
+    all_weeks = set(data_dict) | set(leave_days) | set(global_days) | set(classified_deals)
+    merged: Dict[int, list] = {}
+    for week_num in sorted(all_weeks):
+        meeting_counts = data_dict.get(week_num, (0, 0))
+        days = min(5, leave_days.get(week_num, 0) + global_days.get(week_num, 0))
+        classification = LEAVE_LABELS[days]
+        deals_count = classified_deals.get(week_num, (0,))[0]
+        merged[week_num] = [meeting_counts[0], meeting_counts[1], classification, deals_count]
+
+    user["merged_schedule"] = merged
     return user
 
 
@@ -608,115 +833,116 @@ def process_weekly_data(data):
     Rolls up values for all weeks prior to the current week into a single
     entry at key (current_week_monday_ordinal - 7), then removes the older keys.
     """
-    sum_of_values = 0
-    keys_to_remove = []
     current_week_key = week_monday_ordinal(sydney_today())
 
-    # Iterate through the dictionary to find keys to remove and sum their values
+    # Partition in one pass: past weeks are summed, current and future weeks kept.
+    # Building a new dict also keeps the roll-up when last week itself had values.
+    sum_of_values = 0
+    rolled_up = {}
     for key, value_list in data.items():
         if key < current_week_key:
             sum_of_values += sum(value_list)
-            keys_to_remove.append(key)
-
-    # Add the new key-value pair to the dictionary
-    data[current_week_key - 7] = [sum_of_values]
+        else:
+            rolled_up[key] = value_list
+    rolled_up[current_week_key - 7] = [sum_of_values]
+
+    return rolled_up
+
+
+# Static filters and properties of the deals-without-clarify search; payloads
+# only append the adviser filter. Treat as read-only.
+_DEALS_NO_CLARIFY_FILTERS = (
+    {
+        "propertyName": "pipeline",
+        "operator": "EQ",
+        "value": "152417162",  # client onboarding pipeline
+    },
+    {
+        "propertyName": "dealstage",
+        "operator": "IN",
+        "values": ["257144337", "257144338", "257144339"],
+    },
+    {
+        "propertyName": "most_recent_clarify_booked_date",
+        "operator": "NOT_HAS_PROPERTY",
+    },
+    {
+        "propertyName": "most_recent_clarify_call_date",
+        "operator": "NOT_HAS_PROPERTY",
+    },
+)
+# Only what classify_deals_list, the email bucketing and the simulated
+# clarifies job read; the clarify dates are filtered to be empty anyway.
+_DEALS_NO_CLARIFY_PROPERTIES = ["advisor_email", "agreement_start_date", "dealname"]
 
-    # Remove the summed keys from the dictionary
-    for key in keys_to_remove:
-        del data[key]
 
-    return data
+def _deals_no_clarify_payload(advisor_filter: dict) -> dict:
+    """Build the onboarding deals-without-clarify search for an adviser filter."""
+    return {
+        "filterGroups": [{"filters": [*_DEALS_NO_CLARIFY_FILTERS, advisor_filter]}],
+        "properties": _DEALS_NO_CLARIFY_PROPERTIES,
+        "limit": 100,
+    }
 
 
 def get_deals_no_clarify(user_email):
-    # Use Sydney timezone for current time
-    current_sydney_time = sydney_now()
-    current_timestamp = current_sydney_time.timestamp()
-    # now = int(time.time() * 1000) # convert https://currentmillis.com/
-    two_weeks_ago = current_sydney_time - timedelta(weeks=4)
-    two_weeks_ago_timestamp = int(two_weeks_ago.timestamp() * 1000)
-
-    url = "https://api.hubapi.com/crm/v3/objects/deals/search"
-    data = {
-        "filterGroups": [
-            {
-                "filters": [
-                    {
-                        "propertyName": "pipeline",
-                        "operator": "EQ",
-                        "value": "152417162",  # client onboarding pipeline
-                    },
-                    {
-                        "propertyName": "dealstage",
-                        "operator": "IN",
-                        "values": ["257144337", "257144338", "257144339"],
-                    },
-                    # {
-                    #     "propertyName": "agreement_start_date",
-                    #     "operator": "GTE",
-                    #     "value": f"{two_weeks_ago_timestamp}",
-                    # },
-                    {
-                        "propertyName": "most_recent_clarify_booked_date",
-                        "operator": "NOT_HAS_PROPERTY",
-                    },
-                    {
-                        "propertyName": "most_recent_clarify_call_date",
-                        "operator": "NOT_HAS_PROPERTY",
-                    },
-                    {
-                        "propertyName": "advisor_email",
-                        "operator": "EQ",
-                        "value": f"{user_email}",
-                    },
-                ]
-            }
-        ],
-        "properties": [
-            "advisor_email",
-            "hubspot_owner_id",
-            "agreement_start_date",
-            "hs_next_meeting_id",
-            "hs_next_meeting_name",
-            "hs_next_meeting_start_time",
-            "dealname",
-            "most_recent_clarify_booked_date",
-            "most_recent_clarify_call_date",
-        ],
-        "limit": 100,
-    }
+    data = _deals_no_clarify_payload(
+        {"propertyName": "advisor_email", "operator": "EQ", "value": f"{user_email}"}
+    )
 
-    if not HUBSPOT_TOKEN:
-        raise RuntimeError("HUBSPOT_TOKEN is not configured")
+    _require_hubspot_token()
 
-    session = create_requests_session()
     try:
-        response = session.post(url, headers=HEADERS, json=data, timeout=30)
+        response = HUBSPOT_SESSION.post(DEALS_SEARCH_URL, json=data, timeout=30)
         response.raise_for_status()
         return response.json()["results"]
     except requests.exceptions.RequestException as e:
-        logging.warning(f"Failed to fetch deals without clarify for user {user_email}: {e}")
+        logger.warning("Failed to fetch deals without clarify for user %s: %s", user_email, e)
         return []  # Fallback to empty results
-    finally:
-        session.close()
 
 
-def classify_deals_list(data):
-    # Create an empty dictionary to store the results
-    week_counts = {}
+def get_deals_no_clarify_by_email(user_emails) -> Dict[str, list]:
+    """Return deals without clarify keyed by adviser email (lowercased).
 
-    # Iterate through the data to count items by week number
-    for item in data:
-        # Get the agreement_start_date from the nested dictionary
-        date_str = item.get("properties", {}).get("agreement_start_date")
+    Uses email-batched, paged searches instead of one search per adviser.
+    Emails in a batch that fails are left out of the result, so callers can
+    tell a failed search from an adviser with no deals.
+    """
+    _require_hubspot_token()
 
-        if date_str:
-            # Parse the date string and get the ISO week number
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            week_number = week_monday_ordinal(date_obj)
+    emails = list(dict.fromkeys((e or "").strip().lower() for e in user_emails if e))
+    deals_by_email: Dict[str, list] = {email: [] for email in emails}
+    for email_batch in _chunked(emails, HUBSPOT_IN_FILTER_LIMIT):
+        payload = _deals_no_clarify_payload(
+            {"propertyName": "advisor_email", "operator": "IN", "values": email_batch}
+        )
+        try:
+            results = _hubspot_search_all(DEALS_SEARCH_URL, payload)
+        except requests.exceptions.RequestException as e:
+            logger.warning(
+                "Failed to fetch deals without clarify for %d advisers: %s", len(email_batch), e
+            )
+            for email in email_batch:
+                del deals_by_email[email]
+            continue
+        for deal in results:
+            email = ((deal.get("properties") or {}).get("advisor_email") or "").strip().lower()
+            if email in deals_by_email:
+                deals_by_email[email].append(deal)
+    return deals_by_email
 
-            # Increment the count for the corresponding week
-            week_counts[week_number] = week_counts.get(week_number, 0) + 1
+
+def classify_deals_list(data):
+    # Count deals per agreement start date first, then fold the distinct dates
+    # into weeks so each date is resolved to its week once, not once per deal.
+    date_counts = Counter(
+        date_str
+        for date_str in (item.get("properties", {}).get("agreement_start_date") for item in data)
+        if date_str
+    )
+    week_counts = Counter()
+    for date_str, n in date_counts.items():
+        week_counts[week_monday_ordinal(_parse_iso_day(date_str))] += n
 
     # Format the output to match the requested sample result
     week_counts_result = {week: [count] for week, count in week_counts.items()}
@@ -725,6 +951,10 @@ def classify_deals_list(data):
     return final_counts
 
 
+# Merged-schedule row for a week with no meetings, leave or deals
+_EMPTY_MERGED_WEEK = (0, 0, "No", 0)
+
+
 def compute_capacity(user, min_week):
     """
     change numbers to names ex. leave_col = 2
@@ -732,96 +962,58 @@ def compute_capacity(user, min_week):
 
     data_dict = user["merged_schedule"]
 
-    # --- Step 1: Fill in missing week keys and create a complete dictionary ---
     # Keys are Monday ordinals; step by 7 days
     max_week = max(data_dict.keys())
     # Ensure we have a forward projection horizon to avoid premature termination
     # when searching for earliest week (e.g., project 52 weeks ahead of min_week)
     desired_max_week = max(max_week, min_week + 26 * 7)
     complete_data_dict = {}
-
-    for week_num in range(min_week, desired_max_week + 1, 7):
-        if week_num in data_dict:
-            complete_data_dict[week_num] = data_dict[week_num].copy()
-        else:
-            complete_data_dict[week_num] = [0, 0, "No", 0]
-
-    # Sort the keys to ensure calculations are done in chronological order
-    sorted_weeks = sorted(complete_data_dict.keys())
-
-    # --- Step 2: Add one more column for target capacity ---
-    HIGH = {"3", "4"}
-    LOW = {"1", "2"}
-    for week in sorted_weeks:
-        raw_status = complete_data_dict[week][2]
-        if isinstance(raw_status, str):
-            status_value = raw_status.strip()
+    weeks = range(min_week, desired_max_week + 1, 7)
+
+    # Weeks are visited in chronological order and each row is built once with
+    # all seven columns: the four merged columns, target, actual and difference.
+    # The most recent non-Full row is carried forward, so no walk-back over
+    # runs of Full weeks is needed.
+    prev_non_full = None
+    for week_num, week_target in zip(weeks, _weekly_capacity_targets(user, weeks)):
+        merged = data_dict.get(week_num, _EMPTY_MERGED_WEEK)
+        status = merged[LEAVE_COL]
+
+        # Target capacity from the weekly limit, reduced by leave
+        share = _leave_capacity_share(status)
+        if share == CAPACITY_SHARE_NONE:
+            target_capacity = 0
         else:
-            status_value = "No"
-        if not status_value:
-            status_value = "No"
-
-        target_capacity = weekly_capacity_target(user, week)
-        half_capacity = ceil_div(target_capacity, 2)
-
-        curr_has_high = any(ch in status_value for ch in HIGH)
-        curr_has_low = any(ch in status_value for ch in LOW)
-
-        status_lower = status_value.lower()
-        partial_days = None
-
-        if status_lower.startswith("partial"):
-            try:
-                partial_days = int(str(status_value).split(":")[1].strip())
-            except Exception:
-                partial_days = None
-
-        if status_lower == "no":
-            current_value_capacity = target_capacity
-        elif status_lower == "full":
-            current_value_capacity = 0
-        elif partial_days is not None:
-            current_value_capacity = half_capacity if partial_days in (3, 4) else target_capacity
+            target_capacity = week_target
+            if share == CAPACITY_SHARE_HALF:
+                target_capacity = ceil_div(target_capacity, 2)
+            target_capacity = int(target_capacity)
+
+        # Actual capacity: clarifies this week plus the previous non-Full week
+        if week_num == min_week:
+            actual_capacity = merged[CLARIFY_COL]
+        elif status == "Full":
+            actual_capacity = 0
         else:
-            current_value_capacity = (
-                half_capacity if (curr_has_high or curr_has_low) else target_capacity
-            )
-
-        complete_data_dict[week].append(int(current_value_capacity))
+            actual_capacity = merged[CLARIFY_COL]
+            if prev_non_full is not None:
+                actual_capacity += prev_non_full[CLARIFY_COL]
 
-    # --- Step 3: Add one column (cumulative sum of 1st column and the week before it) ---
-    cumulative_sum_count = 0
-    complete_data_dict[sorted_weeks[0]].append(complete_data_dict[sorted_weeks[0]][0])
-
-    for week_num in sorted_weeks[1:]:
-        if complete_data_dict[week_num][2] == "Full":
-            complete_data_dict[week_num].append(0)
-        else:
-            value_from_first_column = complete_data_dict[week_num][0]
-            prev_week = week_num - 7
-
-            # Walk back until we find a non-Full week or run out
-            while prev_week in complete_data_dict and complete_data_dict[prev_week][2] == "Full":
-                prev_week -= 7
-
-            if prev_week in complete_data_dict:
-                cumulative_sum_count = value_from_first_column + complete_data_dict[prev_week][0]
-            else:
-                cumulative_sum_count = value_from_first_column
-
-            complete_data_dict[week_num].append(cumulative_sum_count)
-
-    # --- Step 4: Add the last column (subtracting actual capacity from target capacity) ---
-    for values in complete_data_dict.values():
-        result = int(values[ACTUAL_CAPACITY_COL] - values[TARGET_CAPACITY_COL])
-        values.append(result)
+        # Build the full row in one go rather than copying and appending
+        row = [*merged, target_capacity, actual_capacity, int(actual_capacity - target_capacity)]
+        complete_data_dict[week_num] = row
+        if status != "Full":
+            prev_non_full = row
 
     user["capacity"] = complete_data_dict
+    # Capacity weeks are contiguous, so later passes can reuse the range
+    # instead of re-sorting the capacity keys.
+    user["capacity_weeks"] = weeks
 
     return user
 
 
-def find_earliest_week(user, min_week, agreement_start_date=None):
+def find_earliest_week(user, min_week, agreement_start_date=None, now_week=None):
     """Compute the earliest week an adviser can take a new client.
 
     Maintains backlog of deals without Clarify and a slack_debt representing
@@ -833,10 +1025,12 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
         user: User object with capacity data
         min_week: Baseline week for capacity calculations
         agreement_start_date: Optional datetime for minimum agreement start constraint
+        now_week: Optional current Monday ordinal, shared across advisers in a run
     """
     user_name = user["properties"]["hs_email"].split("@")[0].replace(".", " ").title()
     logger.info("Finding earliest week for %s", user_name)
-    now_week = week_monday_ordinal(sydney_today())
+    if now_week is None:
+        now_week = week_monday_ordinal(sydney_today())
     min_allowed_week = now_week + FORTNIGHT_DAYS  # must be at least 2 weeks out
 
     # Consider agreement start date as additional constraint
@@ -863,7 +1057,9 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
         starting_week = max(starting_week, agreement_allocation_week)
 
     data = user["capacity"]
-    sorted_weeks = sorted(data.keys())
+    sorted_weeks = user.get("capacity_weeks")
+    if sorted_weeks is None or len(sorted_weeks) != len(data):
+        sorted_weeks = sorted(data.keys())
 
     deal_no_clarify_delay = (
         FORTNIGHT_DAYS  # shift deal start by a fortnight before counting towards backlog
@@ -886,12 +1082,18 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
 
     baseline_week = sorted_weeks[starting_index]
 
-    # Backlog before baseline: deals without clarify from weeks before the baseline week
-    remaining_backlog = sum(
-        v[DEALS_NO_CLARIFY_COL]
-        for k, v in data.items()
-        if k < baseline_week - deal_no_clarify_delay
-    )
+    # One pass over the weeks before the baseline gathers the starting backlog
+    # (deals without clarify, shifted by the delay) and the accumulators.
+    remaining_backlog = 0
+    clarify_accum = 0
+    target_accum = 0
+    for wk in sorted_weeks[:starting_index]:
+        row = data[wk]
+        if wk < baseline_week - deal_no_clarify_delay:
+            remaining_backlog += row[DEALS_NO_CLARIFY_COL]
+        clarify_accum += row[CLARIFY_COL]
+        target_accum += row[TARGET_CAPACITY_COL]
+    target_accum /= 2
 
     # Initialize overflow to 0 baseline - 14 days
     # Overflow is clarify count - target capacity / 2, we remove 1  per capacity until less than 0
@@ -911,12 +1113,15 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
         - _get_col(data, baseline_week - 7, TARGET_CAPACITY_COL, 0) / 2
     )
 
-    logger.debug(
-        "Baseline week for %s: %s (initial backlog %.2f)",
-        user_name,
-        week_label_from_ordinal(baseline_week),
-        remaining_backlog,
-    )
+    # Week labels are only formatted for the per-week trace when it is logged
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    if debug_enabled:
+        logger.debug(
+            "Baseline week for %s: %s (initial backlog %.2f)",
+            user_name,
+            week_label_from_ordinal(baseline_week),
+            remaining_backlog,
+        )
     # Walk forward in non-overlapping fortnights: accumulate new deals for two weeks,
     # then consume using fortnight spare (target - clarifies(prev+curr)).
     fortnight_target = weekly_capacity_target(user, baseline_week)
@@ -925,9 +1130,11 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
 
     backlog_assigned_curr = 0
     backlog_assigned_prev = 0
-
-    clarify_accum = sum(v[CLARIFY_COL] for k, v in data.items() if k < baseline_week)
-    target_accum = sum(v[TARGET_CAPACITY_COL] for k, v in data.items() if k < baseline_week) / 2
+    # Weeks are walked in order, so the most recent non-Full row is carried
+    # forward instead of searching back over runs of Full weeks each week.
+    prev_row = data.get(_find_prev_non_full_ooo_week(data, sorted_weeks, baseline_week), ())
+    next_non_full = _next_non_full_ooo_weeks(data, sorted_weeks)
+    week_count = len(sorted_weeks)
 
     logger.debug(
         "Starting accumulators for %s -> clarify %.2f target %.2f",
@@ -938,9 +1145,10 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
     for idx, wk in enumerate(sorted_weeks[starting_index:]):
         # Check if this week has Full OOO status - skip entirely if so
         if _is_full_ooo_week(data, wk):
-            logger.debug(
-                "Week %s skipped for %s (Full OOO)", week_label_from_ordinal(wk), user_name
-            )
+            if debug_enabled:
+                logger.debug(
+                    "Week %s skipped for %s (Full OOO)", week_label_from_ordinal(wk), user_name
+                )
             continue
 
         # starts at baseline_week current + 14 days
@@ -950,24 +1158,29 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
 
         # Only evaluate consumption at the end of each 2-week block
         # if idx % 2 == 1:
-        prev_wk = _find_prev_non_full_ooo_week(data, sorted_weeks, wk)
-        clarify_curr = _get_col(data, wk, CLARIFY_COL, 0)
-        clarify_prev = _get_col(data, prev_wk, CLARIFY_COL, 0)
+        # The current and previous non-Full rows are fetched once and their
+        # columns read directly.
+        curr_row = data[wk]
+        clarify_curr = _row_col(curr_row, CLARIFY_COL, 0)
+        clarify_prev = _row_col(prev_row, CLARIFY_COL, 0)
 
         # Use the current week's target as the fortnight target reference (matches how 'difference' is computed)
-        block_target = _get_col(data, wk, TARGET_CAPACITY_COL, weekly_capacity_target(user, wk))
+        # (every capacity row carries its target, so the fallback is rarely needed)
+        block_target = _row_col(curr_row, TARGET_CAPACITY_COL, None)
+        if block_target is None:
+            block_target = weekly_capacity_target(user, wk)
         capacity_this_week = block_target - clarify_prev - clarify_curr - backlog_assigned_prev
 
         # Find the next non-Full OOO week for capacity calculation
-        next_available_week = _find_next_non_full_ooo_week(data, sorted_weeks, wk + 7)
-        capacity_next_week = -_get_col(data, next_available_week, DIFFERENCE_COL, 0)
+        next_idx = bisect_left(sorted_weeks, wk + 7)
+        next_available_week = next_non_full[next_idx] if next_idx < week_count else wk + 7
+        diff_next = _get_col(data, next_available_week, DIFFERENCE_COL, 0)
+        capacity_next_week = -diff_next
 
         actual_capacity_this_week = min(capacity_this_week, capacity_next_week)
 
         week_limit = WEEKLY_HARD_LIMIT - clarify_curr
-        diff_curr = _get_col(data, wk, DIFFERENCE_COL, 0)
-        diff_next = _get_col(data, next_available_week, DIFFERENCE_COL, 0)
-        diff_prev = _get_col(data, prev_wk, DIFFERENCE_COL, 0)
+        diff_prev = _row_col(prev_row, DIFFERENCE_COL, 0)
 
         backlog_assigned_curr = max(
             min(
@@ -988,24 +1201,25 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
         target_accum += block_target / 2
         clarify_accum += clarify_curr + new_deals
 
-        logger.debug(
-            "Week %s (%s): new deals=%s clarify_prev=%s clarify_curr=%s target=%s capacity=%.2f assigned=%.2f backlog=%.2f",
-            week_label_from_ordinal(wk),
-            user_name,
-            new_deals,
-            clarify_prev,
-            clarify_curr,
-            block_target,
-            final_capacity_curr,
-            backlog_assigned_curr,
-            remaining_backlog,
-        )
-        logger.debug(
-            "Accumulators for %s -> clarify %.2f target %.2f",
-            user_name,
-            clarify_accum,
-            target_accum,
-        )
+        if debug_enabled:
+            logger.debug(
+                "Week %s (%s): new deals=%s clarify_prev=%s clarify_curr=%s target=%s capacity=%.2f assigned=%.2f backlog=%.2f",
+                week_label_from_ordinal(wk),
+                user_name,
+                new_deals,
+                clarify_prev,
+                clarify_curr,
+                block_target,
+                final_capacity_curr,
+                backlog_assigned_curr,
+                remaining_backlog,
+            )
+            logger.debug(
+                "Accumulators for %s -> clarify %.2f target %.2f",
+                user_name,
+                clarify_accum,
+                target_accum,
+            )
         if remaining_backlog <= 0 and final_capacity_curr > 0.5 and target_accum > clarify_accum:
             candidate = max(wk, min_allowed_week)
             if agreement_allocation_week:
@@ -1019,6 +1233,7 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
                 final_capacity_curr,
             )
             return user
+        prev_row = curr_row
 
     # If backlog still remains after projected weeks, include any pending block deals
     last_week = sorted_weeks[-1]
@@ -1028,15 +1243,13 @@ def find_earliest_week(user, min_week, agreement_start_date=None):
         final_week = max(final_week, agreement_allocation_week)
 
     # Try to find the first 2-week pair with negative differences at/after final_week
-    sorted_weeks = sorted(data.keys())
     start_idx = _first_index_at_or_after(sorted_weeks, final_week)
     chosen = None
     if start_idx is not None:
         for i in range(start_idx, len(sorted_weeks)):
             wk = sorted_weeks[i]
-            prev_wk = _prev_week(wk)
             diff_curr = _get_col(data, wk, DIFFERENCE_COL, 0)
-            diff_prev = _get_col(data, prev_wk, DIFFERENCE_COL, 0)
+            diff_prev = _get_col(data, wk - 7, DIFFERENCE_COL, 0)
             if diff_prev < 0 and diff_curr < 0:
                 chosen = wk
                 break
@@ -1066,61 +1279,95 @@ def display_data(data):
         "Difference",
     ]
 
-    # Get a sorted list of week numbers to display the data chronologically
-    sorted_weeks = sorted(data.keys())
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
 
-    # Determine column widths for consistent formatting
-    column_widths = [len(header) for header in headers]
-    for week in sorted_weeks:
-        row_data = [week_label_from_ordinal(week)] + [str(item) for item in data[week]]
-        for i, item in enumerate(row_data):
-            column_widths[i] = max(column_widths[i], len(item))
+    # Format each week once, chronologically, for both sizing and output
+    rows = [
+        [week_label_from_ordinal(week)] + [str(item) for item in data[week]]
+        for week in sorted(data.keys())
+    ]
 
-    lines = []
-    header_row = " | ".join(header.ljust(width) for header, width in zip(headers, column_widths))
-    lines.append(header_row)
+    # Each column is as wide as its longest cell, header included
+    column_widths = [max(map(len, column)) for column in zip(headers, *rows)]
 
+    # One left-aligned template renders every row at the computed widths
+    row_format = " | ".join(f"{{:<{width}}}" for width in column_widths)
     separator = "-|-".join("-" * width for width in column_widths)
-    lines.append(separator)
-
-    for week in sorted_weeks:
-        row_data = [week_label_from_ordinal(week)] + [str(item) for item in data[week]]
-        data_row = " | ".join(item.ljust(width) for item, width in zip(row_data, column_widths))
-        lines.append(data_row)
+    lines = [row_format.format(*headers), separator]
+    lines.extend(row_format.format(*row_data) for row_data in rows)
 
     logger.debug("Capacity table:\n%s", "\n".join(lines))
 
 
+USERS_URL = "https://api.hubapi.com/crm/v3/objects/users"
+USER_PROPERTIES = (
+    "taking_on_clients,hs_email,hubspot_owner_id,adviser_start_date,"
+    "pod_type,client_types,household_type"
+)
+
+
+def _fetch_hubspot_users() -> list:
+    """Return every HubSpot user, following ``paging.next.after`` past the first 100."""
+    params = {"properties": USER_PROPERTIES, "limit": 100}
+    users = []
+    while True:
+        response = HUBSPOT_SESSION.get(USERS_URL, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        users.extend(data.get("results", []))
+        after = ((data.get("paging") or {}).get("next") or {}).get("after")
+        if not after:
+            return users
+        params["after"] = after
+
+
 # TTL cache for HubSpot users (2 minute cache to reduce API calls)
 _USER_IDS_CACHE = TTLCache(maxsize=1, ttl=120)
 _USER_IDS_CACHE_KEY = "users"
+_user_ids_lock = threading.Lock()
+# Email -> user index over the cached users list it was built from; rebuilt
+# whenever the cache hands back a different list.
+_users_by_email_index: Optional[tuple] = None
+
+
+def _copy_users(users: list) -> list:
+    """Copy cached users so per-request fields never leak into the cache.
+
+    The allocation pipeline attaches meetings, schedules and limits to each
+    user record; handing out copies keeps concurrent requests independent.
+    """
+    return [{**user, "properties": dict(user.get("properties") or {})} for user in users]
 
 
 def get_user_ids_adviser():
     """Fetch HubSpot adviser users with 2-minute TTL caching."""
+    return _copy_users(_cached_hubspot_users())
+
+
+def _cached_hubspot_users() -> list:
+    """Return the shared cached users list, loading it on a miss.
+
+    Callers must not mutate the result; get_user_ids_adviser hands out copies.
+    """
     # Return cached result if available
-    if _USER_IDS_CACHE_KEY in _USER_IDS_CACHE:
+    cached = _USER_IDS_CACHE.get(_USER_IDS_CACHE_KEY)
+    if cached is not None:
         logger.debug("Returning cached HubSpot users")
-        return _USER_IDS_CACHE[_USER_IDS_CACHE_KEY]
-
-    url = (
-        "https://api.hubapi.com/crm/v3/objects/users"
-        "?properties=taking_on_clients,hs_email,hubspot_owner_id,adviser_start_date,"
-        "pod_type,client_types,household_type&limit=100"
-    )
-    if not HUBSPOT_TOKEN:
-        raise RuntimeError("HUBSPOT_TOKEN is not configured")
+        return cached
 
-    session = create_requests_session()
+    _require_hubspot_token()
 
     try:
-        logger.info("Loading HubSpot users (cache miss)")
-        response = session.get(url, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        users = response.json().get("results", [])
-        logger.info("Loaded %d HubSpot users", len(users))
-        # Cache the result
-        _USER_IDS_CACHE[_USER_IDS_CACHE_KEY] = users
+        # One request loads the list while concurrent callers wait for it
+        with _user_ids_lock:
+            users = _USER_IDS_CACHE.get(_USER_IDS_CACHE_KEY)
+            if users is None:
+                logger.info("Loading HubSpot users (cache miss)")
+                users = _fetch_hubspot_users()
+                logger.info("Loaded %d HubSpot users", len(users))
+                # Cache the result
+                _USER_IDS_CACHE[_USER_IDS_CACHE_KEY] = users
         return users
 
     except requests.exceptions.ConnectionError as e:
@@ -1148,17 +1395,18 @@ def get_user_ids_adviser():
         logger.error("HubSpot unexpected error: %s", error_msg)
         raise RuntimeError(error_msg)
 
-    finally:
-        session.close()
-
 
 def get_adviser(service_package, agreement_start_date=None, household_type=None):
     logger.info("Adviser allocation started for service package %s", service_package)
+    agreement_start_datetime = None
     if agreement_start_date:
-        agreement_date = datetime.fromtimestamp(
+        agreement_start_datetime = datetime.fromtimestamp(
             int(agreement_start_date) / 1000, tz=SYDNEY_TZ
-        ).date()
-        logger.info("Agreement start date provided: %s", agreement_date.isoformat())
+        )
+        logger.info(
+            "Agreement start date provided: %s",
+            agreement_start_datetime.date().isoformat(),
+        )
     else:
         logger.info("Agreement start date not provided")
 
@@ -1197,17 +1445,13 @@ def get_adviser(service_package, agreement_start_date=None, household_type=None)
         len(users_list),
     )
 
-    # Load global closures once
     db = get_cloudsql_db()
-    global_closures = classify_leave_weeks(db.get_global_closures())
 
     # Convert agreement_start_date from milliseconds to week ordinal
     agreement_start_week = None
     agreement_allocation_week = None
-    if agreement_start_date:
-        agreement_start_week = week_monday_ordinal(
-            datetime.fromtimestamp(int(agreement_start_date) / 1000, tz=SYDNEY_TZ).date()
-        )
+    if agreement_start_datetime is not None:
+        agreement_start_week = week_monday_ordinal(agreement_start_datetime.date())
         if agreement_start_week is not None:
             agreement_allocation_week = agreement_start_week + 7
             logger.info(
@@ -1216,39 +1460,54 @@ def get_adviser(service_package, agreement_start_date=None, household_type=None)
                 week_label_from_ordinal(agreement_allocation_week),
             )
 
-    for i, user in enumerate(users_list):
+    # Meeting baseline, current week and agreement constraint are shared by every adviser
+    today = sydney_today()
+    now_week = week_monday_ordinal(today)
+    timestamp_milliseconds = get_monday_from_weeks_ago(today, n=1)
+    min_week = now_week - 7  # the Monday the meeting baseline starts from
+
+    adviser_emails = [u["properties"]["hs_email"] for u in users_list]
+
+    def load_cloudsql_inputs():
+        # Global closures once, then every adviser's EH employee ID and leave
+        # in one query each
+        closures = get_global_closure_weeks(db)
+        ids = _employee_ids_for_emails(db, adviser_emails)
+        _prefetch_employee_leaves(db, ids.values())
+        return closures, ids
+
+    # Meetings and deals without clarify come from batched HubSpot searches
+    # that don't depend on CloudSQL, so all three run at once.
+    (global_closures, employee_ids), _, deals_by_email = _run_concurrently(
+        load_cloudsql_inputs,
+        lambda: get_users_meeting_details(users_list, timestamp_milliseconds),
+        lambda: get_deals_no_clarify_by_email(adviser_emails),
+    )
+
+    def analyse_adviser(indexed_user):
+        i, user = indexed_user
         user_email = user["properties"]["hs_email"]
-        user_name = user_email.split("@")[0].replace(".", " ").title()
         logger.info("Processing adviser %d/%d: %s", i + 1, len(users_list), user_email)
 
         # get user approved leave requests from EH
-        employee_id = db.get_employee_id_by_email(user_email)
-        if not employee_id:
-            employee_leaves = []
-        else:
-            employee_leaves = db.get_employee_leaves_as_dicts(employee_id)
-        user["leave_requests"] = employee_leaves
+        user["leave_requests"] = _employee_leaves(db, employee_ids.get(user_email))
 
         # get week number of approved leave requests
-        user["leave_requests_list"] = classify_leave_weeks(user["leave_requests"])
+        user["leave_requests_list"] = classify_leave_weeks(user["leave_requests"], as_days=True)
 
         # get user limit, 6 or 4 depending on some details
-        user = get_user_client_limits(user)
+        user = get_user_client_limits(user, today=today)
 
-        # get meeting details
-        timestamp_milliseconds = get_monday_from_weeks_ago(n=1)
-        min_week = week_monday_ordinal(
-            datetime.fromtimestamp((timestamp_milliseconds / 1000), tz=SYDNEY_TZ).date()
-        )
-
-        user = get_user_meeting_details(user, timestamp_milliseconds)
-
-        # get clarify meeting counts
+        # get clarify meeting counts; advisers whose batched search failed
+        # retry on their own
+        if user.pop("meetings_error", None):
+            user = get_user_meeting_details(user, timestamp_milliseconds)
         user_meetings = (user.get("meetings") or {}).get("results", [])
         user["meeting_count_list"] = get_meeting_count(user_meetings)
 
         # get deals with no clarify for each user
-        user["deals_no_clarify"] = get_deals_no_clarify(user_email)
+        deals = deals_by_email.get(user_email.strip().lower())
+        user["deals_no_clarify"] = deals if deals is not None else get_deals_no_clarify(user_email)
 
         # classify deals with no clarify (get week numbers)
         user["deals_no_clarify_list"] = classify_deals_list(user["deals_no_clarify"])
@@ -1257,8 +1516,6 @@ def get_adviser(service_package, agreement_start_date=None, household_type=None)
         user["global_closure_weeks"] = global_closures
         user = get_merged_schedule(user)
 
-        # allocate deal to most suitable adviser
-        current_week = week_monday_ordinal(sydney_today())
         # Respect future start: allow allocation starting PRESTART_WEEKS before start date
         availability_week = user.get("availability_start_week")
         effective_min_week = max(min_week, availability_week) if availability_week else min_week
@@ -1277,28 +1534,29 @@ def get_adviser(service_package, agreement_start_date=None, household_type=None)
                 availability_date.isoformat(),
                 week_label_from_ordinal(availability_week),
             )
-        logger.debug(
-            "%s analysis window: %s -> %s",
-            user_email,
-            week_label_from_ordinal(min_week),
-            week_label_from_ordinal(effective_min_week + 26 * 7),
-        )
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug(
+                "%s analysis window: %s -> %s",
+                user_email,
+                week_label_from_ordinal(min_week),
+                week_label_from_ordinal(effective_min_week + 26 * 7),
+            )
 
         user = compute_capacity(user, effective_min_week)
 
-        display_data(user["capacity"])
+        if debug_enabled:
+            display_data(user["capacity"])
 
-        # Convert agreement_start_date to datetime for find_earliest_week
-        agreement_start_datetime = None
-        if agreement_start_date:
-            agreement_start_datetime = datetime.fromtimestamp(
-                int(agreement_start_date) / 1000, tz=SYDNEY_TZ
-            )
-
-        user = find_earliest_week(user, effective_min_week, agreement_start_datetime)
-
-        users_list[i] = user
+        user = find_earliest_week(
+            user, effective_min_week, agreement_start_datetime, now_week=now_week
+        )
         logger.info("Completed adviser analysis for %s", user_email)
+        return user
+
+    # Each adviser's pipeline is independent network I/O, so fan out across a
+    # bounded pool; results keep the original adviser order.
+    users_list = _map_advisers(analyse_adviser, list(enumerate(users_list)))
 
     if not users_list:
         raise RuntimeError("No eligible advisers found for the requested service package")
@@ -1306,15 +1564,16 @@ def get_adviser(service_package, agreement_start_date=None, household_type=None)
     logger.info("Evaluating final adviser selection")
 
     # Show all advisers and their earliest weeks
-    logger.debug("All adviser availability:")
-    for user in users_list:
-        user_name = user["properties"]["hs_email"].split("@")[0].replace(".", " ").title()
-        wk = user.get("earliest_open_week")
-        wk_label = week_label_from_ordinal(wk) if isinstance(wk, int) else str(wk)
-        earliest_date = (
-            date.fromordinal(wk).strftime("%B %d, %Y") if isinstance(wk, int) else "Unknown"
-        )
-        logger.debug("  %s -> %s (%s)", user_name, wk_label, earliest_date)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("All adviser availability:")
+        for user in users_list:
+            user_name = user["properties"]["hs_email"].split("@")[0].replace(".", " ").title()
+            wk = user.get("earliest_open_week")
+            wk_label = week_label_from_ordinal(wk) if isinstance(wk, int) else str(wk)
+            earliest_date = (
+                date.fromordinal(wk).strftime("%B %d, %Y") if isinstance(wk, int) else "Unknown"
+            )
+            logger.debug("  %s -> %s (%s)", user_name, wk_label, earliest_date)
 
     # Filter advisers whose earliest_open_week is later than or equal to the first allocation week
     if agreement_allocation_week:
@@ -1336,17 +1595,22 @@ def get_adviser(service_package, agreement_start_date=None, household_type=None)
         logger.info("%d advisers meet the agreement start window", len(eligible_users))
         users_list = eligible_users
 
-    # Find the earliest week among remaining advisers
-    earliest_week = min(user.get("earliest_open_week", float("inf")) for user in users_list)
+    # One pass finds the earliest week among remaining advisers and everyone tied for it
+    earliest_week = float("inf")
+    tied_advisers = []
+    for user in users_list:
+        week = user.get("earliest_open_week", float("inf"))
+        if week < earliest_week:
+            earliest_week = week
+            tied_advisers = [user]
+        elif week == earliest_week:
+            tied_advisers.append(user)
     earliest_date = (
         date.fromordinal(earliest_week).strftime("%B %d, %Y")
         if isinstance(earliest_week, int)
         else "Unknown"
     )
 
-    # Get all advisers tied for the earliest week
-    tied_advisers = [user for user in users_list if user.get("earliest_open_week") == earliest_week]
-
     logger.info(
         "Earliest availability selected: %s (%s) across %d advisers",
         week_label_from_ordinal(earliest_week),
@@ -1384,23 +1648,21 @@ def get_adviser(service_package, agreement_start_date=None, household_type=None)
             return total_clarify / max(total_target, 1)
 
         # Select adviser with lowest ratio (most capacity available relative to target)
-        min_ratio = min(calculate_tiebreaker_ratio(user) for user in tied_advisers)
-        ratio_tied_advisers = [
-            user
-            for user in tied_advisers
-            if abs(calculate_tiebreaker_ratio(user) - min_ratio) < 1e-6
-        ]
-
-        logger.debug("Workload ratios (clarify/target):")
-        for user in tied_advisers:
-            user_name = user["properties"]["hs_email"].split("@")[0].replace(".", " ").title()
-            ratio = calculate_tiebreaker_ratio(user)
-            status = ""
-            if user in ratio_tied_advisers:
-                status = (
-                    " 🎯 (LOWEST)" if len(ratio_tied_advisers) == 1 else " 🎯 (TIED FOR LOWEST)"
-                )
-            logger.debug("  %s -> %.3f%s", user_name, ratio, status)
+        ratios = [calculate_tiebreaker_ratio(user) for user in tied_advisers]
+        min_ratio = min(ratios)
+        lowest = [abs(ratio - min_ratio) < 1e-6 for ratio in ratios]
+        ratio_tied_advisers = [user for user, is_low in zip(tied_advisers, lowest) if is_low]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Workload ratios (clarify/target):")
+            for user, ratio, is_low in zip(tied_advisers, ratios, lowest):
+                user_name = user["properties"]["hs_email"].split("@")[0].replace(".", " ").title()
+                status = ""
+                if is_low:
+                    status = (
+                        " 🎯 (LOWEST)" if len(ratio_tied_advisers) == 1 else " 🎯 (TIED FOR LOWEST)"
+                    )
+                logger.debug("  %s -> %.3f%s", user_name, ratio, status)
 
         if len(ratio_tied_advisers) == 1:
             final_agent = ratio_tied_advisers[0]
@@ -1470,32 +1732,13 @@ def get_users_taking_on_clients():
     """Return all HubSpot users with taking_on_clients == True.
 
     Includes properties: hs_email, hubspot_owner_id, adviser_start_date, pod_type, client_types.
+    Reads through the cached users list rather than re-fetching every page.
     """
-    url = (
-        "https://api.hubapi.com/crm/v3/objects/users"
-        "?properties=taking_on_clients,hs_email,hubspot_owner_id,adviser_start_date,"
-        "pod_type,client_types,household_type&limit=100"
-    )
-    if not HUBSPOT_TOKEN:
-        raise RuntimeError("HUBSPOT_TOKEN is not configured")
-
-    session = create_requests_session()
-    try:
-        response = session.get(url, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        users = response.json().get("results", [])
-        users_list = []
-        for user in users:
-            props = user.get("properties") or {}
-            if props.get("taking_on_clients") == "True":
-                users_list.append(user)
-        return users_list
-    except requests.exceptions.RequestException as e:
-        error_msg = f"Failed to load advisers taking on clients: {str(e)}"
-        logger.error("HubSpot adviser load error: %s", error_msg)
-        raise RuntimeError(error_msg)
-    finally:
-        session.close()
+    return [
+        user
+        for user in get_user_ids_adviser()
+        if (user.get("properties") or {}).get("taking_on_clients") == "True"
+    ]
 
 
 def get_users_earliest_availability(agreement_start_date=None, include_no=True):
@@ -1510,10 +1753,10 @@ def get_users_earliest_availability(agreement_start_date=None, include_no=True):
 
     Returns a list of concise dicts per user suitable for API output.
     """
-    logging.info("Starting earliest availability computation (include_no=%s)", include_no)
+    logger.info("Starting earliest availability computation (include_no=%s)", include_no)
     # Use the helper that already filters to advisers taking on clients
     users = get_user_ids_adviser()
-    logging.info("Fetched %d HubSpot users for availability check", len(users))
+    logger.info("Fetched %d HubSpot users for availability check", len(users))
     # Filter advisers based on include_no parameter BEFORE computation
     users_list = []
     for user in users:
@@ -1533,9 +1776,7 @@ def get_users_earliest_availability(agreement_start_date=None, include_no=True):
             # Only include advisers who are taking on clients
             if taking_on_clients:
                 users_list.append(user)
-    logging.info("Advisers after filtering: %d", len(users_list))
-
-    results = []
+    logger.info("Advisers after filtering: %d", len(users_list))
 
     # Use provided agreement_start_date or default to Sydney now
     if agreement_start_date is None:
@@ -1549,41 +1790,69 @@ def get_users_earliest_availability(agreement_start_date=None, include_no=True):
 
     # Establish baseline week using current date (1 week ago Monday) - not agreement start date
     # This ensures display weeks are consistent regardless of future agreement dates
-    timestamp_milliseconds = get_monday_from_weeks_ago(n=1)
-    min_week = week_monday_ordinal(
-        datetime.fromtimestamp((timestamp_milliseconds / 1000), tz=SYDNEY_TZ).date()
-    )
+    today = sydney_today()
+    today_week = week_monday_ordinal(today)
+    timestamp_milliseconds = get_monday_from_weeks_ago(today, n=1)
+    min_week = today_week - 7
 
-    # Load global closures once for this computation
     db = get_cloudsql_db()
-    global_closures = classify_leave_weeks(db.get_global_closures())
+    user_emails = [(u.get("properties") or {}).get("hs_email") for u in users_list]
 
-    for idx, user in enumerate(users_list, start=1):
+    def load_cloudsql_inputs():
+        # Global closures once for this computation, then employee IDs and leave
+        closures = get_global_closure_weeks(db)
+        try:
+            ids = _employee_ids_for_emails(db, user_emails)
+            _prefetch_employee_leaves(db, ids.values())
+        except Exception as e:
+            # Each adviser then looks up its own ID, so a CloudSQL failure shows
+            # up as per-adviser error rows instead of failing the whole report
+            logger.warning("Failed to prefetch employee IDs and leave: %s", e)
+            ids = {}
+        return closures, ids
+
+    # Batched HubSpot searches for every adviser's meetings and deals, run
+    # alongside the CloudSQL lookups
+    (global_closures, employee_ids), _, deals_by_email = _run_concurrently(
+        load_cloudsql_inputs,
+        lambda: get_users_meeting_details(users_list, timestamp_milliseconds),
+        lambda: get_deals_no_clarify_by_email(user_emails),
+    )
+
+    def summarise_adviser(indexed_user):
+        idx, user = indexed_user
         try:
             user_email = user["properties"].get("hs_email")
-            logging.info("Processing adviser %d/%d: %s", idx, len(users_list), user_email)
+            logger.info("Processing adviser %d/%d: %s", idx, len(users_list), user_email)
             # Pull EH leave from CloudSQL
-            employee_id = db.get_employee_id_by_email(user_email)
-            employee_leaves = db.get_employee_leaves_as_dicts(employee_id) if employee_id else []
+            if user_email in employee_ids:
+                employee_id = employee_ids[user_email]
+            else:
+                employee_id = _employee_ids_for_emails(db, [user_email]).get(user_email)
+            employee_leaves = _employee_leaves(db, employee_id)
             user["leave_requests"] = employee_leaves
-            logging.debug("  Leave records retrieved: %d", len(employee_leaves))
+            logger.debug("  Leave records retrieved: %d", len(employee_leaves))
 
             # Classify leave weeks
-            user["leave_requests_list"] = classify_leave_weeks(user["leave_requests"])
+            user["leave_requests_list"] = classify_leave_weeks(user["leave_requests"], as_days=True)
 
             # Limits and availability window (pre-start weeks)
-            user = get_user_client_limits(user)
+            user = get_user_client_limits(user, today=today)
 
-            # Meetings since baseline
-            user = get_user_meeting_details(user, timestamp_milliseconds)
+            # Meetings since baseline; a failed batched search is this adviser's error
+            if user.get("meetings_error"):
+                raise RuntimeError(user["meetings_error"])
             user_meetings = (user.get("meetings") or {}).get("results", [])
             user["meeting_count_list"] = get_meeting_count(user_meetings)
-            logging.debug("  Meetings retrieved: %d", len(user_meetings))
+            logger.debug("  Meetings retrieved: %d", len(user_meetings))
 
             # Deals without Clarify
-            user["deals_no_clarify"] = get_deals_no_clarify(user_email)
+            deals_key = (user_email or "").strip().lower()
+            if deals_key and deals_key not in deals_by_email:
+                raise RuntimeError("Failed to fetch deals without clarify")
+            user["deals_no_clarify"] = deals_by_email.get(deals_key, [])
             user["deals_no_clarify_list"] = classify_deals_list(user["deals_no_clarify"])
-            logging.debug("  Deals without clarify: %d", len(user["deals_no_clarify"]))
+            logger.debug("  Deals without clarify: %d", len(user["deals_no_clarify"]))
 
             # Merge into schedule (include global closures) and compute capacity
             user["global_closure_weeks"] = global_closures
@@ -1592,13 +1861,14 @@ def get_users_earliest_availability(agreement_start_date=None, include_no=True):
             availability_week = user.get("availability_start_week")
             effective_min_week = max(min_week, availability_week) if availability_week else min_week
             user = compute_capacity(user, effective_min_week)
-            user = find_earliest_week(user, effective_min_week, agreement_start_date)
+            user = find_earliest_week(
+                user, effective_min_week, agreement_start_date, now_week=today_week
+            )
 
             earliest_wk = user.get("earliest_open_week")
             props = user["properties"]
 
             schedule = user.get("capacity_override_schedule") or []
-            today_week = week_monday_ordinal(sydney_today())
             active_override = None
             upcoming_override = None
             for entry in schedule:
@@ -1642,60 +1912,62 @@ def get_users_earliest_availability(agreement_start_date=None, include_no=True):
 
             limit_source = override_status or ("base" if display_limit is not None else None)
 
-            logging.info(
-                "Finished adviser %s: earliest week %s",
-                user_email,
-                week_label_from_ordinal(earliest_wk) if isinstance(earliest_wk, int) else "n/a",
+            earliest_label = (
+                week_label_from_ordinal(earliest_wk) if isinstance(earliest_wk, int) else None
             )
-            results.append(
-                {
-                    "email": props.get("hs_email"),
-                    "pod_type": props.get("pod_type"),
-                    "pod_type_source": "base",
-                    "service_packages": (props.get("client_types") or ""),
-                    "hubspot_owner_id": props.get("hubspot_owner_id"),
-                    "client_limit_monthly": display_limit,
-                    "client_limit_source": limit_source,
-                    "taking_on_clients": props.get("taking_on_clients"),
-                    "household_type": props.get("household_type"),
-                    "availability_start_week": user.get("availability_start_week"),
-                    "earliest_open_week": earliest_wk,
-                    "earliest_open_week_label": (
-                        week_label_from_ordinal(earliest_wk)
-                        if isinstance(earliest_wk, int)
-                        else None
-                    ),
-                    "capacity_override_status": override_status,
-                    "capacity_override_effective_week": override_effective_week,
-                    "capacity_override_effective_label": override_effective_label,
-                    "capacity_override_effective_date": override_effective_date,
-                    "capacity_override_limit": override_limit,
-                    "capacity_override_schedule": schedule,
-                }
+            logger.info(
+                "Finished adviser %s: earliest week %s", user_email, earliest_label or "n/a"
             )
+            return {
+                "email": props.get("hs_email"),
+                "pod_type": props.get("pod_type"),
+                "pod_type_source": "base",
+                "service_packages": (props.get("client_types") or ""),
+                "hubspot_owner_id": props.get("hubspot_owner_id"),
+                "client_limit_monthly": display_limit,
+                "client_limit_source": limit_source,
+                "taking_on_clients": props.get("taking_on_clients"),
+                "household_type": props.get("household_type"),
+                "availability_start_week": user.get("availability_start_week"),
+                "earliest_open_week": earliest_wk,
+                "earliest_open_week_label": earliest_label,
+                "capacity_override_status": override_status,
+                "capacity_override_effective_week": override_effective_week,
+                "capacity_override_effective_label": override_effective_label,
+                "capacity_override_effective_date": override_effective_date,
+                "capacity_override_limit": override_limit,
+                "capacity_override_schedule": schedule,
+            }
         except Exception as e:
             # Collect error per user but continue with others
-            results.append(
-                {
-                    "email": user.get("properties", {}).get("hs_email"),
-                    "service_packages": (user.get("properties", {}).get("client_types") or ""),
-                    "pod_type": user.get("properties", {}).get("pod_type"),
-                    "hubspot_owner_id": user.get("properties", {}).get("hubspot_owner_id"),
-                    "household_type": user.get("properties", {}).get("household_type"),
-                    "error": str(e),
-                }
-            )
+            props = user.get("properties") or {}
+            return {
+                "email": props.get("hs_email"),
+                "service_packages": (props.get("client_types") or ""),
+                "pod_type": props.get("pod_type"),
+                "hubspot_owner_id": props.get("hubspot_owner_id"),
+                "household_type": props.get("household_type"),
+                "error": str(e),
+            }
 
+    # As in get_adviser, advisers are analysed on the bounded pool; results
+    # keep the original adviser order.
+    results = _map_advisers(summarise_adviser, list(enumerate(users_list, start=1)))
     return results
 
 
 def get_user_by_email(user_email: str):
     """Return HubSpot user object for the given email among those taking on clients."""
-    users = get_user_ids_adviser()
-    for u in users:
-        if (u.get("properties") or {}).get("hs_email") == user_email:
-            return u
-    return None
+    global _users_by_email_index
+    users = _cached_hubspot_users()
+    index = _users_by_email_index
+    if index is None or index[0] is not users:
+        # Built in reverse so the first user with a given email wins, as with a scan
+        by_email = {(u.get("properties") or {}).get("hs_email"): u for u in reversed(users)}
+        index = _users_by_email_index = (users, by_email)
+    user = index[1].get(user_email)
+    # Only the matched user is copied, not the whole list
+    return _copy_users([user])[0] if user is not None else None
 
 
 def compute_user_schedule_by_email(user_email: str, agreement_start_date=None):
@@ -1709,20 +1981,20 @@ def compute_user_schedule_by_email(user_email: str, agreement_start_date=None):
     Returns a dict with keys: 'capacity' (dict keyed by Monday ordinal),
     'earliest_open_week' (int), and 'min_week' (int baseline used).
     """
-    logging.info("Computing schedule for %s", user_email)
+    logger.info("Computing schedule for %s", user_email)
     user = get_user_by_email(user_email)
     if not user:
         raise ValueError("User not found or not taking on clients")
 
     # Load EH leave from CloudSQL
     db = get_cloudsql_db()
-    employee_id = db.get_employee_id_by_email(user_email)
-    employee_leaves = db.get_employee_leaves_as_dicts(employee_id) if employee_id else []
+    employee_id = _employee_ids_for_emails(db, [user_email]).get(user_email)
+    employee_leaves = _employee_leaves(db, employee_id)
     user["leave_requests"] = employee_leaves
-    logging.debug("  Leave records retrieved: %d", len(employee_leaves))
+    logger.debug("  Leave records retrieved: %d", len(employee_leaves))
 
     # Classify leave weeks
-    user["leave_requests_list"] = classify_leave_weeks(user["leave_requests"])
+    user["leave_requests_list"] = classify_leave_weeks(user["leave_requests"], as_days=True)
 
     # Limits and availability window
     user = get_user_client_limits(user)
@@ -1739,22 +2011,21 @@ def compute_user_schedule_by_email(user_email: str, agreement_start_date=None):
 
     # Establish baseline week using current date (1 week ago Monday) - not agreement start date
     # This ensures display weeks are consistent regardless of future agreement dates
-    timestamp_milliseconds = get_monday_from_weeks_ago(n=1)
-    min_week = week_monday_ordinal(
-        datetime.fromtimestamp((timestamp_milliseconds / 1000), tz=SYDNEY_TZ).date()
-    )
+    today = sydney_today()
+    timestamp_milliseconds = get_monday_from_weeks_ago(today, n=1)
+    min_week = week_monday_ordinal(today) - 7
     user = get_user_meeting_details(user, timestamp_milliseconds)
     user_meetings = (user.get("meetings") or {}).get("results", [])
     user["meeting_count_list"] = get_meeting_count(user_meetings)
-    logging.debug("  Meetings retrieved: %d", len(user_meetings))
+    logger.debug("  Meetings retrieved: %d", len(user_meetings))
 
     # Deals without Clarify
     user["deals_no_clarify"] = get_deals_no_clarify(user_email)
     user["deals_no_clarify_list"] = classify_deals_list(user["deals_no_clarify"])
-    logging.debug("  Deals without clarify: %d", len(user["deals_no_clarify"]))
+    logger.debug("  Deals without clarify: %d", len(user["deals_no_clarify"]))
 
     # Global closures
-    user["global_closure_weeks"] = classify_leave_weeks(db.get_global_closures())
+    user["global_closure_weeks"] = get_global_closure_weeks(db)
 
     # Merge + compute capacity
     user = get_merged_schedule(user)
@@ -1763,7 +2034,7 @@ def compute_user_schedule_by_email(user_email: str, agreement_start_date=None):
     effective_min_week = max(min_week, availability_week) if availability_week else min_week
     user = compute_capacity(user, effective_min_week)
     user = find_earliest_week(user, effective_min_week, agreement_start_date)
-    logging.info(
+    logger.info(
         "Computed schedule for %s: earliest week %s",
         user_email,
         (
@@ -1786,12 +2057,17 @@ def week_monday_ordinal(d: date) -> int:
     Using Monday's ordinal as the week key avoids ISO week rollover issues
     across year boundaries.
     """
-    monday = d - timedelta(days=d.weekday())
-    return monday.toordinal()
+    # Ordinals count days, so Monday is the ordinal minus the weekday offset;
+    # no intermediate timedelta/date objects are needed.
+    return d.toordinal() - d.weekday()
 
 
+@lru_cache(maxsize=8192)
 def week_label_from_ordinal(wk: int) -> str:
-    """Human-readable label for a week ordinal (YYYY-Www)."""
+    """Human-readable label for a week ordinal (YYYY-Www).
+
+    Labels are cached: the same few dozen weeks are labelled for every adviser.
+    """
     monday = date.fromordinal(wk)
     iso_year, iso_week, _ = monday.isocalendar()
     return f"{iso_year}-W{iso_week:02d}"
@@ -1826,9 +2102,17 @@ def should_filter_by_household(package_type: str) -> bool:
     return rules is not None  # None means ignore household type
 
 
-def _normalized_set(raw: str) -> set[str]:
-    """Split a semi-structured CRM string into normalized lowercase values."""
-    return {p.strip().lower() for p in re.split(r"[;,/|]+", raw or "") if p.strip()}
+_CRM_LIST_SEPARATORS = re.compile(r"[;,/|]+")
+
+
+@lru_cache(maxsize=256)
+def _normalized_set(raw: str) -> frozenset[str]:
+    """Split a semi-structured CRM string into normalized lowercase values.
+
+    Advisers share a handful of distinct client_types/household_type strings,
+    so each is split once and reused across eligibility checks.
+    """
+    return frozenset(p.strip().lower() for p in _CRM_LIST_SEPARATORS.split(raw or "") if p.strip())
 
 
 def _format_service_label(token: str) -> str:
@@ -25,6 +25,11 @@ logger = logging.getLogger(__name__)
 # Module-level engine cache
 _engine: Optional[Engine] = None
 
+# Connection pool sizing. Advisers are analysed on worker threads alongside the
+# request threads, so the pool can be grown per deployment without a code change.
+DEFAULT_POOL_SIZE = int(os.getenv("CLOUD_SQL_POOL_SIZE", "8"))
+DEFAULT_MAX_OVERFLOW = int(os.getenv("CLOUD_SQL_MAX_OVERFLOW", "4"))
+
 
 class CloudSQLConnector:
     """Manages Cloud SQL connections using Cloud SQL Python Connector"""
@@ -35,8 +40,8 @@ class CloudSQLConnector:
         user: str,
         password: str,
         db: str,
-        pool_size: int = 8,
-        max_overflow: int = 4,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_overflow: int = DEFAULT_MAX_OVERFLOW,
         enable_iam_auth: bool = False,
     ):
         self.instance_connection_string = instance_connection_string
@@ -137,8 +142,8 @@ def get_db_engine(force_new: bool = False) -> Engine:
         )
         _engine = create_engine(
             connection_url,
-            pool_size=8,
-            max_overflow=4,
+            pool_size=DEFAULT_POOL_SIZE,
+            max_overflow=DEFAULT_MAX_OVERFLOW,
             pool_timeout=30,
             pool_recycle=1800,
             pool_pre_ping=True,
@@ -22,6 +22,26 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Single-employee email lookup shared by every by-email query: either email
+# column may match, and a company_email match wins over an account_email one.
+# get_employee_ids_by_emails applies the same precedence for batches.
+_EMPLOYEE_BY_EMAIL_CLAUSE = """
+    FROM aa_employees
+    WHERE company_email = :email
+       OR account_email = :email
+    ORDER BY
+        CASE WHEN company_email = :email THEN 0 ELSE 1 END
+    LIMIT 1
+"""
+
+
+def _leave_range_row_to_dict(row) -> Dict[str, Any]:
+    """Map a leave or closure row to the start/end ISO date range used by allocation."""
+    return {
+        "start_date": row.start_date.isoformat() if row.start_date else None,
+        "end_date": row.end_date.isoformat() if row.end_date else None,
+    }
+
 
 class AdviserAllocationDB:
     """Data access layer for adviser_allocation CloudSQL tables."""
@@ -37,17 +57,14 @@ class AdviserAllocationDB:
         """Get employee by company_email or account_email."""
         with self.engine.connect() as conn:
             result = conn.execute(
-                text("""
+                text(
+                    """
                     SELECT employee_id, name, company_email, account_email,
                            client_limit_monthly, pod_type_effective, hubspot_owner_id,
                            is_active, created_at, updated_at, last_synced
-                    FROM aa_employees
-                    WHERE company_email = :email
-                       OR account_email = :email
-                    ORDER BY
-                        CASE WHEN company_email = :email THEN 0 ELSE 1 END
-                    LIMIT 1
-                """),
+                    """
+                    + _EMPLOYEE_BY_EMAIL_CLAUSE
+                ),
                 {"email": email},
             )
             row = result.fetchone()
@@ -69,8 +86,45 @@ class AdviserAllocationDB:
 
     def get_employee_id_by_email(self, email: str) -> Optional[str]:
         """Get employee ID by company email (for backwards compatibility)."""
-        emp = self.get_employee_by_email(email)
-        return emp.employee_id if emp else None
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text("SELECT employee_id" + _EMPLOYEE_BY_EMAIL_CLAUSE),
+                {"email": email},
+            )
+            row = result.fetchone()
+            return row.employee_id if row else None
+
+    def get_employee_ids_by_emails(self, emails: List[str]) -> Dict[str, str]:
+        """Map emails to employee IDs in a single query.
+
+        Mirrors get_employee_by_email: a company_email match wins over an
+        account_email match. Emails without an employee are omitted.
+        """
+        emails = [e for e in dict.fromkeys(emails) if e]
+        if not emails:
+            return {}
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text("""
+                    SELECT employee_id, company_email, account_email
+                    FROM aa_employees
+                    WHERE company_email = ANY(:emails)
+                       OR account_email = ANY(:emails)
+                """),
+                {"emails": emails},
+            )
+            by_company: Dict[str, str] = {}
+            by_account: Dict[str, str] = {}
+            for row in result:
+                if row.company_email:
+                    by_company.setdefault(row.company_email, row.employee_id)
+                if row.account_email:
+                    by_account.setdefault(row.account_email, row.employee_id)
+        return {
+            email: by_company.get(email) or by_account[email]
+            for email in emails
+            if email in by_company or email in by_account
+        }
 
     def upsert_employee(self, emp: Employee) -> None:
         """Insert or update employee record."""
@@ -178,6 +232,50 @@ class AdviserAllocationDB:
             for lr in leaves
         ]
 
+    def get_employee_leave_ranges(self, employee_id: str) -> List[Dict[str, Any]]:
+        """Get only the start/end dates of an employee's leaves.
+
+        Allocation only needs the date range of each leave, so this skips the
+        remaining columns and the LeaveRequest construction.
+        """
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text("""
+                    SELECT start_date, end_date
+                    FROM aa_leave_requests
+                    WHERE employee_id = :employee_id
+                    ORDER BY start_date DESC
+                """),
+                {"employee_id": employee_id},
+            )
+            return [_leave_range_row_to_dict(row) for row in result]
+
+    def get_leave_ranges_by_employee_ids(
+        self, employee_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get leave date ranges for many employees in a single query.
+
+        Every requested employee is present in the result, with an empty list
+        when they have no leave.
+        """
+        employee_ids = [e for e in dict.fromkeys(employee_ids) if e]
+        ranges: Dict[str, List[Dict[str, Any]]] = {emp_id: [] for emp_id in employee_ids}
+        if not employee_ids:
+            return ranges
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text("""
+                    SELECT employee_id, start_date, end_date
+                    FROM aa_leave_requests
+                    WHERE employee_id = ANY(:employee_ids)
+                    ORDER BY start_date DESC
+                """),
+                {"employee_ids": employee_ids},
+            )
+            for row in result:
+                ranges[row.employee_id].append(_leave_range_row_to_dict(row))
+        return ranges
+
     def get_all_leaves_as_dicts(self) -> List[Dict[str, Any]]:
         """Get all leave requests as dictionaries in a single query."""
         with self.engine.connect() as conn:
@@ -292,6 +390,22 @@ class AdviserAllocationDB:
                 )
             return closures
 
+    def get_global_closure_ranges(self) -> List[Dict[str, Any]]:
+        """Get only the start/end dates of office closures.
+
+        Allocation only classifies closure dates into weeks, so this skips the
+        descriptive and audit columns that the closures UI needs.
+        """
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                text("""
+                    SELECT start_date, end_date
+                    FROM aa_office_closures
+                    ORDER BY start_date DESC
+                """)
+            )
+            return [_leave_range_row_to_dict(row) for row in result]
+
     def insert_office_closure(
         self,
         start_date: date,
@@ -11,22 +11,29 @@ Run via:
 
 import logging
 import uuid
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from adviser_allocation.core.allocation import (
     CLARIFY_COL,
     TARGET_CAPACITY_COL,
+    _employee_ids_for_emails,
+    _employee_leaves,
+    _prefetch_employee_leaves,
     classify_deals_list,
     classify_leave_weeks,
     compute_capacity,
     get_deals_no_clarify,
+    get_deals_no_clarify_by_email,
+    get_global_closure_weeks,
     get_meeting_count,
     get_merged_schedule,
     get_user_client_limits,
     get_user_ids_adviser,
     get_user_meeting_details,
+    get_users_meeting_details,
     week_monday_ordinal,
 )
 from adviser_allocation.utils.common import get_cloudsql_db, sydney_now, sydney_today
@@ -40,9 +47,22 @@ def get_all_deals_without_clarify() -> Dict[str, List[Dict[str, Any]]]:
     Returns:
         Dict mapping adviser_email -> list of deal dicts
     """
+    return _fetch_deals_without_clarify()[0]
+
+
+def _fetch_deals_without_clarify() -> Tuple[
+    Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]
+]:
+    """Fetch deals without Clarify as both job deal dicts and raw HubSpot deals.
+
+    Returns:
+        Tuple of (adviser_email -> deal dicts, adviser_email -> raw HubSpot deals)
+    """
     users = get_user_ids_adviser()
     deals_by_adviser = defaultdict(list)
+    raw_deals_by_email: Dict[str, List[Dict[str, Any]]] = {}
 
+    emails = []
     for user in users:
         props = user.get("properties") or {}
         email = (props.get("hs_email") or "").lower().strip()
@@ -52,24 +72,33 @@ def get_all_deals_without_clarify() -> Dict[str, List[Dict[str, Any]]]:
         taking_on = props.get("taking_on_clients")
         if taking_on is None or str(taking_on).strip() == "":
             continue
+        emails.append(email)
 
-        try:
+    try:
+        deals_by_email = get_deals_no_clarify_by_email(emails)
+    except Exception as e:
+        logger.warning("Failed to fetch deals without clarify: %s", e)
+        return deals_by_adviser, raw_deals_by_email
+
+    for email in emails:
+        # Advisers whose batched search failed are fetched on their own
+        deals = deals_by_email.get(email)
+        if deals is None:
             deals = get_deals_no_clarify(email)
-            for deal in deals:
-                deal_props = deal.get("properties") or {}
-                deals_by_adviser[email].append(
-                    {
-                        "deal_id": deal.get("id"),
-                        "deal_name": deal_props.get("dealname"),
-                        "adviser_email": email,
-                        "agreement_start_date": deal_props.get("agreement_start_date"),
-                        "client_email": None,  # Could extract from associations if needed
-                    }
-                )
-        except Exception as e:
-            logger.warning("Failed to fetch deals for %s: %s", email, e)
+        raw_deals_by_email[email] = deals
+        for deal in deals:
+            deal_props = deal.get("properties") or {}
+            deals_by_adviser[email].append(
+                {
+                    "deal_id": deal.get("id"),
+                    "deal_name": deal_props.get("dealname"),
+                    "adviser_email": email,
+                    "agreement_start_date": deal_props.get("agreement_start_date"),
+                    "client_email": None,  # Could extract from associations if needed
+                }
+            )
 
-    return deals_by_adviser
+    return deals_by_adviser, raw_deals_by_email
 
 
 def parse_agreement_date(value: Any) -> Optional[date]:
@@ -94,6 +123,11 @@ def parse_agreement_date(value: Any) -> Optional[date]:
 def compute_simulated_placements_for_adviser(
     user: Dict[str, Any],
     deals: List[Dict[str, Any]],
+    employee_ids: Optional[Dict[str, str]] = None,
+    global_closure_weeks: Optional[List[List[Any]]] = None,
+    meetings: Optional[List[Dict[str, Any]]] = None,
+    raw_deals: Optional[List[Dict[str, Any]]] = None,
+    leaves_by_employee: Optional[Dict[str, List[Dict[str, Any]]]] = None,
 ) -> List[Dict[str, Any]]:
     """Compute projected weeks for deals without Clarify for a single adviser.
 
@@ -102,6 +136,11 @@ def compute_simulated_placements_for_adviser(
     Args:
         user: HubSpot user dict with properties
         deals: List of deals without Clarify for this adviser
+        employee_ids: Optional prefetched email -> EH employee ID map
+        global_closure_weeks: Optional pre-classified office closure weeks
+        meetings: Optional prefetched HubSpot meetings for this adviser
+        raw_deals: Optional prefetched HubSpot deals without Clarify (raw format)
+        leaves_by_employee: Optional prefetched EH employee ID -> leave ranges map
 
     Returns:
         List of dicts with deal_id, projected_week, etc.
@@ -117,26 +156,36 @@ def compute_simulated_placements_for_adviser(
         db = get_cloudsql_db()
 
         # Leave requests from CloudSQL
-        employee_id = db.get_employee_id_by_email(email)
-        employee_leaves = db.get_employee_leaves_as_dicts(employee_id) if employee_id else []
+        if employee_ids is not None:
+            employee_id = employee_ids.get(email)
+        else:
+            employee_id = db.get_employee_id_by_email(email)
+        if not employee_id:
+            employee_leaves = []
+        elif leaves_by_employee is not None and employee_id in leaves_by_employee:
+            employee_leaves = leaves_by_employee[employee_id]
+        else:
+            employee_leaves = db.get_employee_leave_ranges(employee_id)
         user["leave_requests"] = employee_leaves
-        user["leave_requests_list"] = classify_leave_weeks(employee_leaves)
+        user["leave_requests_list"] = classify_leave_weeks(employee_leaves, as_days=True)
 
         # Office closures
-        user["global_closure_weeks"] = classify_leave_weeks(db.get_global_closures())
+        if global_closure_weeks is None:
+            global_closure_weeks = get_global_closure_weeks(db)
+        user["global_closure_weeks"] = global_closure_weeks
 
         # Client limits
         user = get_user_client_limits(user)
 
         # Meetings from HubSpot
-        four_weeks_ago = sydney_now() - timedelta(weeks=4)
-        timestamp_ms = int(four_weeks_ago.timestamp() * 1000)
-        user = get_user_meeting_details(user, timestamp_ms)
-        user_meetings = (user.get("meetings") or {}).get("results", [])
-        user["meeting_count_list"] = get_meeting_count(user_meetings)
+        if meetings is None:
+            user = get_user_meeting_details(user, _meetings_since_ms())
+            meetings = (user.get("meetings") or {}).get("results", [])
+        user["meeting_count_list"] = get_meeting_count(meetings)
 
         # Deals without clarify (raw HubSpot format for classify_deals_list)
-        raw_deals = get_deals_no_clarify(email)
+        if raw_deals is None:
+            raw_deals = get_deals_no_clarify(email)
         user["deals_no_clarify"] = raw_deals
         user["deals_no_clarify_list"] = classify_deals_list(raw_deals)
 
@@ -167,8 +216,12 @@ def compute_simulated_placements_for_adviser(
 
     # Walk weeks and assign deals respecting capacity
     assignments = []
-    deal_queue = list(sorted_deals)
-    sorted_weeks = sorted(capacity.keys())
+    deal_queue = deque(sorted_deals)
+    # compute_capacity records its contiguous week range; only fall back to
+    # sorting the keys when it is missing or out of step with the capacity.
+    sorted_weeks = user.get("capacity_weeks")
+    if sorted_weeks is None or len(sorted_weeks) != len(capacity):
+        sorted_weeks = sorted(capacity.keys())
 
     # Track how many we've assigned to each week
     assigned_per_week = defaultdict(int)
@@ -194,7 +247,7 @@ def compute_simulated_placements_for_adviser(
 
         # Assign deals to this week
         while available > 0 and deal_queue:
-            deal = deal_queue.pop(0)
+            deal = deal_queue.popleft()
             monday = date.fromordinal(week_ordinal)
             assignments.append(
                 {
@@ -221,7 +274,7 @@ def compute_simulated_placements_for_adviser(
             for _ in range(min(weekly_target, len(deal_queue))):
                 if not deal_queue:
                     break
-                deal = deal_queue.pop(0)
+                deal = deal_queue.popleft()
                 assignments.append(
                     {
                         "deal_id": deal["deal_id"],
@@ -264,6 +317,12 @@ def _naive_placements(deals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return assignments
 
 
+def _meetings_since_ms() -> int:
+    """Return the meeting search window start (four weeks ago) in milliseconds."""
+    four_weeks_ago = sydney_now() - timedelta(weeks=4)
+    return int(four_weeks_ago.timestamp() * 1000)
+
+
 def run_computation() -> Tuple[int, int]:
     """Run the full computation for all advisers.
 
@@ -273,8 +332,9 @@ def run_computation() -> Tuple[int, int]:
     batch_id = uuid.uuid4()
     logger.info("Starting simulated clarifies computation (batch %s)", batch_id)
 
-    # Get all deals grouped by adviser
-    deals_by_adviser = get_all_deals_without_clarify()
+    # Get all deals grouped by adviser, keeping the raw HubSpot deals so the
+    # capacity pass doesn't search for them again
+    deals_by_adviser, raw_deals_by_email = _fetch_deals_without_clarify()
     logger.info("Found deals for %d advisers", len(deals_by_adviser))
 
     # Get all adviser users for capacity computation
@@ -286,6 +346,53 @@ def run_computation() -> Tuple[int, int]:
         if email:
             user_by_email[email] = user
 
+    scheduled_users = [user_by_email[email] for email in deals_by_adviser if email in user_by_email]
+
+    def prefetch_cloudsql():
+        """Resolve employee IDs, their leave and office closures once for every adviser.
+
+        Goes through the allocation engine's employee caches, so warm instances
+        skip the lookups and refresh_employee_cache() applies here too.
+        """
+        employee_ids = None
+        leaves_by_employee = None
+        global_closure_weeks = None
+        try:
+            db = get_cloudsql_db()
+            employee_ids = _employee_ids_for_emails(db, list(deals_by_adviser))
+            _prefetch_employee_leaves(db, employee_ids.values())
+            leaves_by_employee = {
+                emp_id: _employee_leaves(db, emp_id) for emp_id in employee_ids.values() if emp_id
+            }
+            global_closure_weeks = get_global_closure_weeks(db)
+        except Exception as e:
+            logger.warning("Failed to prefetch employees and closures: %s", e)
+        return employee_ids, leaves_by_employee, global_closure_weeks
+
+    def prefetch_meetings() -> None:
+        """Batch the HubSpot meeting searches across advisers.
+
+        Advisers in a failed batch are left without prefetched meetings, so
+        compute_simulated_placements_for_adviser fetches their own.
+        """
+        try:
+            get_users_meeting_details(scheduled_users, _meetings_since_ms())
+        except Exception as e:
+            logger.warning("Failed to prefetch meetings: %s", e)
+            for user in scheduled_users:
+                user.pop("meetings", None)
+            return
+        for user in scheduled_users:
+            if user.pop("meetings_error", None):
+                user.pop("meetings", None)
+
+    # The CloudSQL lookups and meeting searches are independent, so the
+    # database round trips run on a worker while the searches page through.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        cloudsql_future = executor.submit(prefetch_cloudsql)
+        prefetch_meetings()
+        employee_ids, leaves_by_employee, global_closure_weeks = cloudsql_future.result()
+
     # Compute placements for each adviser
     all_assignments = []
     advisers_processed = 0
@@ -296,7 +403,16 @@ def run_computation() -> Tuple[int, int]:
             logger.warning("No user data for %s, using naive placement", email)
             assignments = _naive_placements(deals)
         else:
-            assignments = compute_simulated_placements_for_adviser(user, deals)
+            meetings = user.get("meetings")
+            assignments = compute_simulated_placements_for_adviser(
+                user,
+                deals,
+                employee_ids,
+                global_closure_weeks,
+                meetings=meetings["results"] if meetings else None,
+                raw_deals=raw_deals_by_email.get(email),
+                leaves_by_employee=leaves_by_employee,
+            )
 
         # Add batch ID to all assignments
         for a in assignments:
@@ -38,6 +38,8 @@ from adviser_allocation.core.allocation import (
     get_user_meeting_details,
     get_users_earliest_availability,
     refresh_capacity_override_cache,
+    refresh_employee_cache,
+    refresh_global_closure_cache,
     week_label_from_ordinal,
 )
 from adviser_allocation.services.allocation_service import store_allocation_record
@@ -47,6 +49,7 @@ from adviser_allocation.utils.common import (
     sydney_now,
     sydney_today,
 )
+from adviser_allocation.utils.http_client import get_with_retries, patch_with_retries
 
 # Load variables from .env into environment
 load_dotenv()
@@ -228,7 +231,7 @@ def meeting_object_type_id() -> str:
     if not HUBSPOT_TOKEN:
         return "0-4"
     try:
-        resp = requests.get(
+        resp = get_with_retries(
             "https://api.hubapi.com/crm/v3/schemas/meetings",
             headers=HUBSPOT_HEADERS,
             timeout=8,
@@ -416,6 +419,7 @@ def get_employees():
         }
         cloudsql_db.upsert_employee_dict(item)
         employees.append(item)
+    refresh_employee_cache()
 
     return (employees, r_emps.status_code, {"Content-Type": "application/json"})
 
@@ -477,7 +481,9 @@ def get_leave_requests():
         if e.status_code != 200:
             raise RuntimeError(f"Refresh failed: {e.status_code} {e.text}")
 
-        for leave_request in e.json()["data"]["items"]:
+        # Decode each page once; it supplies both the items and the page count
+        page_data = e.json()["data"]
+        for leave_request in page_data["items"]:
             start_date_obj = datetime.fromisoformat(leave_request["start_date"]).date()
             if (leave_request["status"] == "Approved") and (start_date_obj > now_date):
                 item = {
@@ -491,13 +497,14 @@ def get_leave_requests():
                 cloudsql_db.upsert_leave_request_dict(item)
 
         page += 1
-        total_pages = e.json()["data"]["total_pages"]
+        total_pages = page_data["total_pages"]
 
     # Remove stale leave records (cancelled/moved in EH but still in CloudSQL)
     synced_ids = [lr["leave_request_id"] for lr in leave_requests]
     deleted = cloudsql_db.delete_stale_future_leave(synced_ids, now_date)
     if deleted:
         logger.info("Deleted %d stale future leave records", deleted)
+    refresh_employee_cache()
 
     return (leave_requests, e.status_code, {"Content-Type": "application/json"})
 
@@ -558,6 +565,7 @@ def sync_employees():
             cloudsql_db = get_cloudsql_db()
             backfilled = cloudsql_db.backfill_company_emails_from_hubspot()
             if backfilled:
+                refresh_employee_cache()
                 logger.info("Backfilled company_email for %d employees from HubSpot", backfilled)
         except Exception as exc:
             logger.warning("Failed to backfill company emails: %s", exc)
@@ -680,6 +688,7 @@ def sync_calendar_closures():
 
         cloudsql_db = get_cloudsql_db()
         result = _sync(calendar_sources=sources, db=cloudsql_db)
+        refresh_global_closure_cache()
         return jsonify(result), 200
     except Exception as e:
         logger.error("Failed to sync calendar closures: %s", e, exc_info=True)
@@ -792,6 +801,7 @@ def closures():
             description=description,
             tags=tags,
         )
+        refresh_global_closure_cache()
         return (
             jsonify(
                 {
@@ -821,6 +831,7 @@ def closures_item(closure_id):
     if request.method == "DELETE":
         try:
             cloudsql_db.delete_office_closure(closure_id)
+            refresh_global_closure_cache()
             return jsonify({"ok": True}), 200
         except Exception as e:
             logger.error("Failed to delete closure %s: %s", closure_id, e)
@@ -860,6 +871,7 @@ def closures_item(closure_id):
             description=description,
             tags=tags,
         )
+        refresh_global_closure_cache()
         resp = {"id": closure_id, "start_date": start_date, "end_date": end_date}
         if description is not None:
             resp["description"] = description
@@ -1993,7 +2005,7 @@ def availability_meetings():
             start_ts = get_monday_from_weeks_ago(n=weeks_back)
             since_label = datetime.fromtimestamp(start_ts / 1000, tz=SYDNEY_TZ).date().isoformat()
             try:
-                target_user = get_user_meeting_details(target_user, start_ts)
+                target_user = get_user_meeting_details(target_user, start_ts, full=True)
             except Exception as e:
                 logger.error("Failed to fetch meetings for %s: %s", selected, e)
                 error_msg = "Failed to fetch meetings: Internal server error"
@@ -2210,7 +2222,7 @@ def update_meeting_owner():
 
     url = f"https://api.hubapi.com/crm/v3/objects/meetings/{meeting_id}"
     try:
-        resp = requests.patch(
+        resp = patch_with_retries(
             url,
             headers=HUBSPOT_HEADERS,
             json={"properties": {"hubspot_owner_id": new_owner_id}},
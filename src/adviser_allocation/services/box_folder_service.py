@@ -10,7 +10,10 @@ import requests
 from boxsdk import Client, JWTAuth
 from boxsdk.exception import BoxAPIException
 
-from adviser_allocation.utils.http_client import create_session_with_retries
+from adviser_allocation.utils.http_client import (
+    create_session_with_retries,
+    pace_hubspot_rate_limit,
+)
 from adviser_allocation.utils.secrets import get_secret
 
 DEFAULT_BOX_API_BASE_URL = "https://api.box.com/2.0"
@@ -931,6 +934,11 @@ HUBSPOT_HEADERS = {
     "Content-Type": "application/json",
 }
 
+# Shared HubSpot session: deal/contact lookups run several calls per folder,
+# so keep connections to api.hubapi.com alive and retry transient failures.
+HUBSPOT_SESSION = create_session_with_retries(retries=3)
+HUBSPOT_SESSION.hooks["response"].append(pace_hubspot_rate_limit)
+
 _BOX_SERVICE_INITIALISED = False
 _BOX_FOLDER_SERVICE: Optional[BoxFolderService] = None
 
@@ -1050,7 +1058,7 @@ def _fetch_hubspot_contact(contact_id: str) -> Optional[dict]:
     try:
         url = f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}"
         params = {"properties": "firstname,lastname,email"}
-        resp = requests.get(url, headers=_hubspot_headers(), params=params, timeout=10)
+        resp = HUBSPOT_SESSION.get(url, headers=_hubspot_headers(), params=params, timeout=10)
         if resp.status_code == 404:
             logger.warning("HubSpot contact %s not found", contact_id)
             return None
@@ -1068,7 +1076,7 @@ def get_hubspot_deal_contacts(deal_id: str) -> List[dict]:
     try:
         url = "https://api.hubapi.com/crm/v4/associations/deals/contacts/batch/read"
         payload = {"inputs": [{"id": str(deal_id)}]}
-        resp = requests.post(url, headers=_hubspot_headers(), json=payload, timeout=10)
+        resp = HUBSPOT_SESSION.post(url, headers=_hubspot_headers(), json=payload, timeout=10)
         if resp.status_code == 404:
             logger.warning(
                 "HubSpot deal %s not found when retrieving contact associations", deal_id
@@ -1089,7 +1097,7 @@ def get_hubspot_deal_contacts(deal_id: str) -> List[dict]:
 
     if not contact_ids:
         url = f"https://api.hubapi.com/crm/v4/objects/deals/{deal_id}/associations/contacts"
-        resp = requests.get(url, headers=_hubspot_headers(), timeout=10)
+        resp = HUBSPOT_SESSION.get(url, headers=_hubspot_headers(), timeout=10)
         if resp.status_code == 404:
             logger.warning("HubSpot deal %s not found when retrieving contacts", deal_id)
             return []
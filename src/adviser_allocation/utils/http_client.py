@@ -1,6 +1,8 @@
 """HTTP client utilities with retry logic, timeouts, and circuit breaking."""
 
 import logging
+import threading
+import time
 from typing import Any, Dict, Optional
 
 import requests
@@ -13,18 +15,31 @@ logger = logging.getLogger(__name__)
 DEFAULT_TIMEOUT = 10
 LONG_TIMEOUT = 30
 
+# Pace HubSpot calls once fewer than this many requests remain in the window
+HUBSPOT_RATE_LIMIT_FLOOR = 5
+
 
 def create_session_with_retries(
     retries: int = 3,
     backoff_factor: float = 0.3,
     status_forcelist: tuple = (429, 500, 502, 503, 504),
+    raise_on_status: bool = True,
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
 ) -> requests.Session:
     """Create a requests session with automatic retry logic.
 
+    Retries back off exponentially and honour the server's Retry-After header,
+    so callers should not add their own fixed sleeps between requests.
+
     Args:
         retries: Number of retry attempts
         backoff_factor: Backoff factor for exponential waits
         status_forcelist: HTTP status codes to retry on
+        raise_on_status: Raise once retries are exhausted instead of returning
+            the last response
+        pool_connections: Number of host connection pools to cache
+        pool_maxsize: Maximum connections kept per host pool
 
     Returns:
         A configured requests.Session with retry adapter
@@ -35,13 +50,58 @@ def create_session_with_retries(
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
         allowed_methods=["HEAD", "GET", "OPTIONS", "POST", "PATCH"],
+        respect_retry_after_header=True,
+        raise_on_status=raise_on_status,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry_strategy,
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
 
+def pace_hubspot_rate_limit(response: requests.Response, *args, **kwargs) -> requests.Response:
+    """Response hook that slows down when HubSpot's rate-limit window runs low.
+
+    HubSpot reports the remaining requests in the current window. Once fewer
+    than HUBSPOT_RATE_LIMIT_FLOOR remain, wait roughly one request slot per
+    missing request so the window refills instead of tripping a 429.
+    """
+    headers = response.headers
+    try:
+        remaining = int(headers["X-HubSpot-RateLimit-Remaining"])
+        limit = int(headers["X-HubSpot-RateLimit-Max"])
+        interval_ms = int(headers.get("X-HubSpot-RateLimit-Interval-Milliseconds", 10000))
+    except (KeyError, TypeError, ValueError):
+        return response
+    if limit > 0 and remaining < HUBSPOT_RATE_LIMIT_FLOOR:
+        delay = interval_ms / 1000 / limit * (HUBSPOT_RATE_LIMIT_FLOOR - remaining)
+        logger.debug("HubSpot rate limit low (%d remaining); pausing %.3fs", remaining, delay)
+        time.sleep(delay)
+    return response
+
+
+# Pooled sessions shared by the *_with_retries helpers, one per retry budget,
+# so repeated calls reuse keep-alive connections instead of re-handshaking.
+_shared_sessions: Dict[int, requests.Session] = {}
+_shared_sessions_lock = threading.Lock()
+
+
+def _shared_session(retries: int) -> requests.Session:
+    """Return the process-wide session for the given retry budget."""
+    session = _shared_sessions.get(retries)
+    if session is None:
+        with _shared_sessions_lock:
+            session = _shared_sessions.get(retries)
+            if session is None:
+                session = create_session_with_retries(retries=retries)
+                _shared_sessions[retries] = session
+    return session
+
+
 def get_with_retries(
     url: str,
     headers: Optional[Dict[str, str]] = None,
@@ -51,11 +111,8 @@ def get_with_retries(
     **kwargs,
 ) -> requests.Response:
     """GET request with automatic retries and timeout."""
-    session = create_session_with_retries(retries=retries)
-    try:
-        return session.get(url, headers=headers, params=params, timeout=timeout, **kwargs)
-    finally:
-        session.close()
+    session = _shared_session(retries)
+    return session.get(url, headers=headers, params=params, timeout=timeout, **kwargs)
 
 
 def post_with_retries(
@@ -67,11 +124,8 @@ def post_with_retries(
     **kwargs,
 ) -> requests.Response:
     """POST request with automatic retries and timeout."""
-    session = create_session_with_retries(retries=retries)
-    try:
-        return session.post(url, json=json, headers=headers, timeout=timeout, **kwargs)
-    finally:
-        session.close()
+    session = _shared_session(retries)
+    return session.post(url, json=json, headers=headers, timeout=timeout, **kwargs)
 
 
 def patch_with_retries(
@@ -84,20 +138,19 @@ def patch_with_retries(
     **kwargs,
 ) -> requests.Response:
     """PATCH request with automatic retries and timeout."""
-    session = create_session_with_retries(retries=retries)
-    try:
-        if data is not None:
-            return session.patch(url, data=data, headers=headers, timeout=timeout, **kwargs)
-        return session.patch(url, json=json, headers=headers, timeout=timeout, **kwargs)
-    finally:
-        session.close()
+    session = _shared_session(retries)
+    if data is not None:
+        return session.patch(url, data=data, headers=headers, timeout=timeout, **kwargs)
+    return session.patch(url, json=json, headers=headers, timeout=timeout, **kwargs)
 
 
 __all__ = [
     "create_session_with_retries",
+    "pace_hubspot_rate_limit",
     "get_with_retries",
     "post_with_retries",
     "patch_with_retries",
     "DEFAULT_TIMEOUT",
     "LONG_TIMEOUT",
+    "HUBSPOT_RATE_LIMIT_FLOOR",
 ]
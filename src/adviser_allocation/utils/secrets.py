@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 from typing import Optional
 
 try:
@@ -21,7 +22,21 @@ def _make_sm_client():
         return None
 
 
-_SM_CLIENT = _make_sm_client()
+# Built on first use rather than at import: resolving ADC credentials can hit
+# the metadata server, and most secrets are plain environment values.
+_SM_CLIENT_UNSET = object()
+_SM_CLIENT = _SM_CLIENT_UNSET
+_sm_client_lock = threading.Lock()
+
+
+def _sm_client():
+    """Return the shared Secret Manager client, creating it once per process."""
+    global _SM_CLIENT
+    if _SM_CLIENT is _SM_CLIENT_UNSET:
+        with _sm_client_lock:
+            if _SM_CLIENT is _SM_CLIENT_UNSET:
+                _SM_CLIENT = _make_sm_client()
+    return _SM_CLIENT
 
 
 def get_secret(name: str) -> Optional[str]:
@@ -39,9 +54,11 @@ def get_secret(name: str) -> Optional[str]:
         return None
 
     try:
-        if isinstance(hint, str) and hint.startswith("projects/") and _SM_CLIENT:
-            resp = _SM_CLIENT.access_secret_version(request={"name": hint})
-            return resp.payload.data.decode("utf-8")
+        if isinstance(hint, str) and hint.startswith("projects/"):
+            client = _sm_client()
+            if client:
+                resp = client.access_secret_version(request={"name": hint})
+                return resp.payload.data.decode("utf-8")
         return hint
     except Exception as e:  # pragma: no cover
         logging.error("Secret Manager failed for %s: %s", name, e)
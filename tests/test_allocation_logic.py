@@ -1,7 +1,10 @@
 import os
+import threading
 import unittest
 from datetime import date
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+import requests
 
 from adviser_allocation.core import allocation as allocate  # noqa: E402
 
@@ -103,6 +106,345 @@ class AllocationLogicTests(unittest.TestCase):
             "Override should raise fortnight target starting the effective week",
         )
 
+    def test_weekly_capacity_targets_match_per_week_lookup(self):
+        base_week = allocate.week_monday_ordinal(date(2025, 1, 6))
+        user = {
+            "properties": {"hs_email": "test@example.com", "client_limit_monthly": 4},
+            "_base_client_limit_monthly": 4,
+            "capacity_override_schedule": [
+                {"effective_week": base_week + 7, "client_limit_monthly": 8},
+                {"effective_week": base_week + 21, "client_limit_monthly": 0},
+            ],
+        }
+        weeks = range(base_week - 7, base_week + 35, 7)
+
+        self.assertEqual(
+            allocate._weekly_capacity_targets(user, weeks),
+            [allocate.weekly_capacity_target(user, week) for week in weeks],
+        )
+
+    def test_classify_leave_weeks_counts_weekdays_per_week(self):
+        # Thursday 2025-01-02 through Tuesday 2025-01-14, spanning three weeks
+        leave = [{"start_date": "2025-01-02", "end_date": "2025-01-14"}]
+        self.assertEqual(
+            allocate.classify_leave_weeks(leave),
+            [
+                [allocate.week_monday_ordinal(date(2024, 12, 30)), "Partial: 2"],
+                [allocate.week_monday_ordinal(date(2025, 1, 6)), "Full"],
+                [allocate.week_monday_ordinal(date(2025, 1, 13)), "Partial: 2"],
+            ],
+        )
+        self.assertEqual(
+            [days for _, days in allocate.classify_leave_weeks(leave, as_days=True)],
+            [2, 5, 2],
+        )
+        weekend_only = [{"start_date": "2025-01-04", "end_date": "2025-01-05"}]
+        self.assertEqual(allocate.classify_leave_weeks(weekend_only), [])
+
+    @patch("adviser_allocation.core.allocation.sydney_today")
+    def test_classify_deals_list_groups_by_week_and_rolls_up_past(self, mock_today):
+        mock_today.return_value = date(2025, 1, 15)
+        deals = [
+            {"properties": {"agreement_start_date": "2025-01-20"}},
+            {"properties": {"agreement_start_date": "2025-01-22T03:00:00Z"}},
+            {"properties": {"agreement_start_date": "2025-01-20"}},
+            {"properties": {"agreement_start_date": "2024-12-02"}},
+            {"properties": {"agreement_start_date": "2024-11-04"}},
+            {"properties": {}},
+        ]
+        current_week = allocate.week_monday_ordinal(date(2025, 1, 13))
+        self.assertEqual(
+            allocate.classify_deals_list(deals),
+            {current_week + 7: [3], current_week - 7: [2]},
+        )
+
+        # Deals from last week are rolled up with the older ones, not dropped
+        deals.append({"properties": {"agreement_start_date": "2025-01-08"}})
+        self.assertEqual(
+            allocate.classify_deals_list(deals),
+            {current_week + 7: [3], current_week - 7: [3]},
+        )
+
+    @patch.object(allocate, "ADVISER_FANOUT_WORKERS", 4)
+    def test_map_advisers_preserves_input_order(self):
+        items = list(range(20))
+        self.assertEqual(
+            allocate._map_advisers(lambda x: x * 2, items),
+            [x * 2 for x in items],
+            "Concurrent fan-out must return results in adviser order",
+        )
+
+    @patch.object(allocate, "ADVISER_FANOUT_WORKERS", 4)
+    def test_run_concurrently_overlaps_calls_and_keeps_order(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def call(value):
+            barrier.wait()  # only passes if all three calls are in flight together
+            return value
+
+        self.assertEqual(
+            allocate._run_concurrently(lambda: call("a"), lambda: call("b"), lambda: call("c")),
+            ["a", "b", "c"],
+        )
+
+    @patch.object(allocate, "ADVISER_FANOUT_WORKERS", 8)
+    @patch.object(allocate, "_capacity_override_cache_load", return_value={})
+    def test_capacity_overrides_load_once_under_fanout(self, mock_load):
+        allocate.refresh_capacity_override_cache()
+        try:
+            allocate._map_advisers(
+                allocate._capacity_schedule_for_email,
+                [f"adviser{i}@example.com" for i in range(16)],
+            )
+        finally:
+            allocate.refresh_capacity_override_cache()
+        mock_load.assert_called_once()
+
+    def test_global_closures_are_cached_until_refresh(self):
+        allocate.refresh_global_closure_cache()
+        db = MagicMock()
+        db.get_global_closure_ranges.return_value = [
+            {"start_date": "2025-12-25", "end_date": "2025-12-26"}
+        ]
+        try:
+            first = allocate.get_global_closure_weeks(db)
+            self.assertIs(allocate.get_global_closure_weeks(db), first)
+            db.get_global_closure_ranges.assert_called_once()
+
+            allocate.refresh_global_closure_cache()
+            allocate.get_global_closure_weeks(db)
+            self.assertEqual(db.get_global_closure_ranges.call_count, 2)
+        finally:
+            allocate.refresh_global_closure_cache()
+        self.assertEqual(
+            first,
+            allocate.classify_leave_weeks(db.get_global_closure_ranges.return_value, as_days=True),
+        )
+
+    def test_employee_lookups_are_cached_until_refresh(self):
+        allocate.refresh_employee_cache()
+        db = MagicMock()
+        db.get_employee_ids_by_emails.return_value = {"a@example.com": "emp-a"}
+        db.get_employee_leave_ranges.return_value = [{"start_date": "2025-01-06"}]
+
+        for _ in range(3):
+            ids = allocate._employee_ids_for_emails(db, ["a@example.com", "b@example.com"])
+            leaves = allocate._employee_leaves(db, ids["a@example.com"])
+
+        self.assertEqual(ids, {"a@example.com": "emp-a", "b@example.com": None})
+        self.assertEqual(leaves, [{"start_date": "2025-01-06"}])
+        db.get_employee_ids_by_emails.assert_called_once()
+        db.get_employee_leave_ranges.assert_called_once_with("emp-a")
+
+        allocate.refresh_employee_cache()
+        allocate._employee_leaves(db, "emp-a")
+        self.assertEqual(db.get_employee_leave_ranges.call_count, 2)
+
+    def test_employee_id_misses_use_the_short_ttl_cache(self):
+        allocate.refresh_employee_cache()
+        db = MagicMock()
+        db.get_employee_ids_by_emails.return_value = {}
+        try:
+            allocate._employee_ids_for_emails(db, ["new@example.com"])
+            self.assertNotIn("new@example.com", allocate._employee_id_ttl_cache)
+            self.assertIn("new@example.com", allocate._employee_id_miss_ttl_cache)
+
+            # Once the miss expires the adviser is looked up again
+            allocate._employee_id_miss_ttl_cache.clear()
+            db.get_employee_ids_by_emails.return_value = {"new@example.com": "emp-new"}
+            ids = allocate._employee_ids_for_emails(db, ["new@example.com"])
+        finally:
+            allocate.refresh_employee_cache()
+
+        self.assertEqual(ids, {"new@example.com": "emp-new"})
+        self.assertEqual(db.get_employee_ids_by_emails.call_count, 2)
+
+    def test_prefetched_leaves_skip_per_employee_queries(self):
+        allocate.refresh_employee_cache()
+        db = MagicMock()
+        db.get_leave_ranges_by_employee_ids.return_value = {
+            "emp-a": [{"start_date": "2025-01-06", "end_date": "2025-01-07"}],
+            "emp-b": [],
+        }
+
+        allocate._prefetch_employee_leaves(db, ["emp-a", "emp-b", None, "emp-a"])
+        allocate._prefetch_employee_leaves(db, ["emp-a", "emp-b"])
+
+        db.get_leave_ranges_by_employee_ids.assert_called_once_with(["emp-a", "emp-b"])
+        self.assertEqual(len(allocate._employee_leaves(db, "emp-a")), 1)
+        self.assertEqual(allocate._employee_leaves(db, "emp-b"), [])
+        db.get_employee_leave_ranges.assert_not_called()
+        allocate.refresh_employee_cache()
+
+    @patch.object(allocate, "get_deals_no_clarify_by_email", return_value={})
+    @patch.object(allocate, "get_users_meeting_details")
+    @patch.object(allocate, "get_global_closure_weeks", return_value=[])
+    @patch.object(allocate, "get_cloudsql_db")
+    @patch.object(allocate, "get_user_ids_adviser")
+    def test_availability_reports_employee_lookup_failures_per_adviser(
+        self, mock_users, mock_db, _closures, _meetings, _deals
+    ):
+        allocate.refresh_employee_cache()
+        mock_users.return_value = [
+            {"properties": {"hs_email": "a@example.com", "taking_on_clients": "True"}},
+            {"properties": {"hs_email": "b@example.com", "taking_on_clients": "True"}},
+        ]
+        mock_db.return_value.get_employee_ids_by_emails.side_effect = RuntimeError("db down")
+
+        results = allocate.get_users_earliest_availability()
+
+        self.assertEqual([r["email"] for r in results], ["a@example.com", "b@example.com"])
+        self.assertEqual([r["error"] for r in results], ["db down", "db down"])
+
+    @patch.object(allocate, "_hubspot_token", lambda: "test-token")
+    @patch.object(allocate, "HUBSPOT_SESSION")
+    def test_batched_meetings_follow_paging_and_bucket_by_owner(self, mock_session):
+        def meeting(owner_id):
+            return {"properties": {"hubspot_owner_id": owner_id}}
+
+        first_page = MagicMock()
+        first_page.json.return_value = {
+            "results": [meeting("1"), meeting("2")],
+            "paging": {"next": {"after": "2"}},
+        }
+        second_page = MagicMock()
+        second_page.json.return_value = {"results": [meeting("1")]}
+        mock_session.post.side_effect = [first_page, second_page]
+
+        users = [
+            {"properties": {"hubspot_owner_id": "1"}},
+            {"properties": {"hubspot_owner_id": "2"}},
+            {"properties": {"hubspot_owner_id": "3"}},
+        ]
+        allocate.get_users_meeting_details(users, 0)
+
+        self.assertEqual(
+            [len(u["meetings"]["results"]) for u in users],
+            [2, 1, 0],
+        )
+        first_filter = mock_session.post.call_args_list[0][1]["json"]["filterGroups"][0]
+        self.assertEqual(first_filter["filters"][0]["values"], ["1", "2", "3"])
+        self.assertEqual(
+            mock_session.post.call_args_list[0][1]["json"]["properties"],
+            list(allocate.MEETING_COUNT_PROPERTIES),
+        )
+        self.assertEqual(mock_session.post.call_args_list[1][1]["json"]["after"], "2")
+
+    @patch.object(allocate, "_hubspot_token", lambda: "test-token")
+    @patch.object(
+        allocate,
+        "_hubspot_search_all",
+        side_effect=requests.exceptions.HTTPError("429 Too Many Requests"),
+    )
+    def test_failed_batched_searches_mark_affected_advisers(self, _search):
+        users = [{"properties": {"hubspot_owner_id": "1"}}, {"properties": {}}]
+        allocate.get_users_meeting_details(users, 0)
+        deals = allocate.get_deals_no_clarify_by_email(["A@example.com"])
+
+        self.assertEqual(users[0]["meetings"], {"results": []})
+        self.assertIn("429 Too Many Requests", users[0]["meetings_error"])
+        self.assertNotIn("meetings_error", users[1])
+        self.assertEqual(deals, {})
+
+    @patch.object(allocate, "get_deals_no_clarify_by_email", return_value={})
+    @patch.object(allocate, "get_users_meeting_details")
+    @patch.object(allocate, "get_global_closure_weeks", return_value=[])
+    @patch.object(allocate, "get_cloudsql_db")
+    @patch.object(allocate, "get_user_ids_adviser")
+    def test_availability_reports_failed_batched_searches_as_errors(
+        self, mock_users, mock_db, _closures, mock_meetings, _deals
+    ):
+        allocate.refresh_employee_cache()
+        mock_users.return_value = [
+            {"properties": {"hs_email": "a@example.com", "taking_on_clients": "True"}},
+            {"properties": {"hs_email": "b@example.com", "taking_on_clients": "True"}},
+        ]
+        mock_db.return_value.get_employee_ids_by_emails.return_value = {}
+
+        def fail_first_adviser(users, _timestamp):
+            users[0]["meetings_error"] = "Failed to fetch meetings: 503"
+
+        mock_meetings.side_effect = fail_first_adviser
+        try:
+            results = allocate.get_users_earliest_availability()
+        finally:
+            allocate.refresh_employee_cache()
+
+        self.assertEqual(
+            [r["error"] for r in results],
+            ["Failed to fetch meetings: 503", "Failed to fetch deals without clarify"],
+        )
+
+    @patch.object(allocate, "_hubspot_token", lambda: "test-token")
+    @patch.object(allocate, "HUBSPOT_SESSION")
+    def test_hubspot_users_follow_paging(self, mock_session):
+        first_page = MagicMock()
+        first_page.json.return_value = {
+            "results": [{"id": "1"}],
+            "paging": {"next": {"after": "1"}},
+        }
+        second_page = MagicMock()
+        second_page.json.return_value = {"results": [{"id": "2"}]}
+        mock_session.get.side_effect = [first_page, second_page]
+
+        allocate._USER_IDS_CACHE.clear()
+        try:
+            users = allocate.get_user_ids_adviser()
+        finally:
+            allocate._USER_IDS_CACHE.clear()
+
+        self.assertEqual([u["id"] for u in users], ["1", "2"])
+        self.assertEqual(mock_session.get.call_args_list[1][1]["params"]["after"], "1")
+
+    @patch.object(allocate, "_hubspot_token", lambda: "test-token")
+    @patch.object(allocate, "ADVISER_FANOUT_WORKERS", 8)
+    @patch.object(allocate, "_fetch_hubspot_users")
+    def test_cached_hubspot_users_load_once_and_are_copied(self, mock_fetch):
+        mock_fetch.return_value = [{"id": "1", "properties": {"client_limit_monthly": "6"}}]
+
+        allocate._USER_IDS_CACHE.clear()
+        try:
+            results = allocate._map_advisers(lambda _: allocate.get_user_ids_adviser(), range(8))
+            results[0][0]["meetings"] = {"results": []}
+            results[0][0]["properties"]["client_limit_monthly"] = 4
+            fresh = allocate.get_user_ids_adviser()
+        finally:
+            allocate._USER_IDS_CACHE.clear()
+
+        mock_fetch.assert_called_once()
+        self.assertNotIn("meetings", fresh[0])
+        self.assertEqual(fresh[0]["properties"]["client_limit_monthly"], "6")
+
+    def test_hubspot_session_resolves_token_when_requests_are_prepared(self):
+        request = requests.Request("POST", allocate.MEETINGS_SEARCH_URL, json={})
+        with patch.object(allocate, "_hubspot_token", lambda: "test-token"):
+            prepared = allocate.HUBSPOT_SESSION.prepare_request(request)
+        self.assertEqual(prepared.headers["Authorization"], "Bearer test-token")
+        self.assertEqual(prepared.headers["Content-Type"], "application/json")
+
+    @patch.object(allocate, "_hubspot_token", lambda: "test-token")
+    @patch.object(allocate, "_fetch_hubspot_users")
+    def test_user_by_email_uses_index_and_returns_copy(self, mock_fetch):
+        mock_fetch.return_value = [
+            {"id": "1", "properties": {"hs_email": "a@example.com", "pod_type": "Solo"}},
+            {"id": "2", "properties": {"hs_email": "b@example.com"}},
+            {"id": "3", "properties": {"hs_email": "a@example.com"}},
+        ]
+
+        allocate._USER_IDS_CACHE.clear()
+        try:
+            user = allocate.get_user_by_email("a@example.com")
+            user["properties"]["pod_type"] = "Changed"
+            again = allocate.get_user_by_email("a@example.com")
+            missing = allocate.get_user_by_email("c@example.com")
+        finally:
+            allocate._USER_IDS_CACHE.clear()
+
+        self.assertEqual(user["id"], "1", "First match wins, as with a linear scan")
+        self.assertEqual(again["properties"]["pod_type"], "Solo")
+        self.assertIsNone(missing)
+        mock_fetch.assert_called_once()
+
     def test_merged_schedule_combines_partial_weeks(self):
         base_week = allocate.week_monday_ordinal(date(2025, 1, 6))
         user = {
@@ -124,6 +466,19 @@ class AllocationLogicTests(unittest.TestCase):
             "Merged schedule should sum partial days (1+4=5 → Full)",
         )
 
+    def test_display_data_pads_columns_to_widest_cell(self):
+        week = allocate.week_monday_ordinal(date(2025, 1, 6))
+        data = {week + 7: [1, 0, "No", 0, 6, 5, -1], week: [12, 3, "Partial: 2", 0, 6, -6, -12]}
+
+        with self.assertLogs(allocate.logger, level="DEBUG") as logs:
+            allocate.display_data(data)
+
+        lines = logs.records[0].getMessage().splitlines()[1:]
+        self.assertEqual(len({len(line) for line in lines}), 1)
+        self.assertTrue(lines[2].startswith(allocate.week_label_from_ordinal(week)))
+        self.assertIn("| Partial: 2 |", lines[2])
+        self.assertIn("| No         |", lines[3])
+
 
 if __name__ == "__main__":
     unittest.main()
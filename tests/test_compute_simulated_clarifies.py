@@ -0,0 +1,90 @@
+"""Tests for the simulated clarifies job."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from adviser_allocation.core import allocation as allocate
+from adviser_allocation.jobs import compute_simulated_clarifies as job
+
+ADVISER = {
+    "properties": {
+        "hs_email": "a@example.com",
+        "hubspot_owner_id": "1",
+        "taking_on_clients": "True",
+    }
+}
+RAW_DEAL = {"id": "d1", "properties": {"dealname": "Deal", "advisor_email": "a@example.com"}}
+
+
+class TestRunComputation(unittest.TestCase):
+    """Tests for run_computation()."""
+
+    def setUp(self):
+        allocate.refresh_employee_cache()
+        self.addCleanup(allocate.refresh_employee_cache)
+
+    @patch.object(allocate, "_hubspot_token", lambda: "test-token")
+    @patch.object(
+        allocate,
+        "_hubspot_search_all",
+        side_effect=requests.exceptions.HTTPError("503 Service Unavailable"),
+    )
+    @patch.object(job, "compute_simulated_placements_for_adviser", return_value=[])
+    @patch.object(job, "get_deals_no_clarify", return_value=[RAW_DEAL])
+    @patch.object(job, "get_global_closure_weeks", return_value=[])
+    @patch.object(job, "get_cloudsql_db")
+    @patch.object(job, "get_user_ids_adviser")
+    def test_failed_batched_searches_fall_back_to_per_adviser_fetches(
+        self, mock_users, mock_db, _closures, mock_deals, mock_placements, _search
+    ):
+        mock_users.side_effect = lambda: [{"properties": dict(ADVISER["properties"])}]
+        mock_db.return_value.get_employee_ids_by_emails.return_value = {}
+        mock_db.return_value.get_leave_ranges_by_employee_ids.return_value = {}
+
+        job.run_computation()
+
+        mock_deals.assert_called_once_with("a@example.com")
+        # One meeting search and one deal search; the deals are not searched again
+        self.assertEqual(_search.call_count, 2)
+        _, kwargs = mock_placements.call_args
+        self.assertEqual(mock_placements.call_args[0][1][0]["deal_id"], "d1")
+        # None makes compute_simulated_placements_for_adviser fetch its own
+        self.assertIsNone(kwargs["meetings"])
+        self.assertEqual(kwargs["raw_deals"], [RAW_DEAL])
+        self.assertNotIn("meetings_error", mock_placements.call_args[0][0])
+
+    @patch.object(job, "compute_simulated_placements_for_adviser", return_value=[])
+    @patch.object(job, "get_users_meeting_details")
+    @patch.object(job, "_fetch_deals_without_clarify")
+    @patch.object(job, "get_global_closure_weeks", return_value=[])
+    @patch.object(job, "get_cloudsql_db")
+    @patch.object(job, "get_user_ids_adviser")
+    def test_employee_prefetch_uses_the_shared_caches(
+        self, mock_users, mock_db, _closures, mock_all_deals, _meetings, mock_placements
+    ):
+        mock_users.side_effect = lambda: [{"properties": dict(ADVISER["properties"])}]
+        mock_all_deals.side_effect = lambda: (
+            {"a@example.com": [{"deal_id": "d1"}]},
+            {"a@example.com": [RAW_DEAL]},
+        )
+        db = mock_db.return_value
+        db.get_employee_ids_by_emails.return_value = {"a@example.com": "emp-a"}
+        db.get_leave_ranges_by_employee_ids.return_value = {"emp-a": [{"start_date": "2025-01-06"}]}
+
+        job.run_computation()
+        job.run_computation()
+
+        db.get_employee_ids_by_emails.assert_called_once_with(["a@example.com"])
+        db.get_leave_ranges_by_employee_ids.assert_called_once_with(["emp-a"])
+        _, kwargs = mock_placements.call_args
+        self.assertEqual(kwargs["leaves_by_employee"], {"emp-a": [{"start_date": "2025-01-06"}]})
+
+        allocate.refresh_employee_cache()
+        job.run_computation()
+        self.assertEqual(db.get_employee_ids_by_emails.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -113,6 +113,34 @@ class OIDCSyncEndpointTests(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    @patch("adviser_allocation.utils.auth.google_id_token")
+    @patch("adviser_allocation.utils.auth.google_requests")
+    @patch("adviser_allocation.utils.auth.get_secret")
+    @patch("adviser_allocation.main.get_cloudsql_db")
+    @patch("adviser_allocation.services.calendar_sync_service.sync_calendar_closures")
+    @patch("adviser_allocation.services.calendar_sync_service.get_calendar_sources")
+    def test_sync_calendar_closures_clears_closure_cache(
+        self, mock_sources, mock_sync, mock_db, mock_secret, mock_greq, mock_id_token
+    ):
+        from adviser_allocation.core.allocation import _global_closure_ttl_cache
+
+        mock_secret.return_value = None
+        mock_id_token.verify_oauth2_token.return_value = {
+            "email": "scheduler@project.iam.gserviceaccount.com"
+        }
+        mock_greq.Request.return_value = MagicMock()
+        mock_sources.return_value = [("test-cal", None)]
+        mock_sync.return_value = {"upserted": 1, "deleted": 0}
+        _global_closure_ttl_cache["closures"] = [[0, 5]]
+
+        response = self.client.post(
+            "/sync/calendar_closures",
+            headers={"Authorization": "Bearer valid-oidc-token"},
+        )
+        self.assertEqual(response.status_code, 200)
+        mock_sync.assert_called_once()
+        self.assertNotIn("closures", _global_closure_ttl_cache)
+
 
 class HubSpotSignatureTests(unittest.TestCase):
     """Tests for HubSpot signature-protected /post/allocate endpoint."""
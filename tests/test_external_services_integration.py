@@ -72,6 +72,33 @@ class HubSpotIntegrationTests(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         mock_post.assert_called_once()
 
+    def test_box_deal_metadata_cached_until_deal_update(self):
+        """Test that Box deal metadata is fetched once until the deal is updated."""
+        from adviser_allocation.api import box_routes
+
+        box_routes._invalidate_deal_metadata()
+        with (
+            patch.object(
+                box_routes, "_load_deal_metadata", return_value={"household_type": "Single"}
+            ) as mock_load,
+            patch.object(box_routes, "_hubspot_headers", return_value={}),
+            patch.object(box_routes.box_service, "HUBSPOT_SESSION") as mock_session,
+        ):
+            mock_session.patch.return_value.status_code = 200
+            first = box_routes._fetch_deal_metadata("deal123")
+            first["household_type"] = "Couple"
+            self.assertEqual(
+                box_routes._fetch_deal_metadata("deal123"), {"household_type": "Single"}
+            )
+            mock_load.assert_called_once_with("deal123")
+
+            self.assertTrue(
+                box_routes._update_hubspot_deal_properties("deal123", {"household_type": "x"})
+            )
+            box_routes._fetch_deal_metadata("deal123")
+            self.assertEqual(mock_load.call_count, 2)
+        box_routes._invalidate_deal_metadata()
+
     @patch("adviser_allocation.utils.http_client.requests.get")
     def test_hubspot_rate_limit_handling(self, mock_get):
         """Test handling of rate limit responses."""
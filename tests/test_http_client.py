@@ -8,6 +8,7 @@ from adviser_allocation.utils.http_client import (
     DEFAULT_TIMEOUT,
     create_session_with_retries,
     get_with_retries,
+    pace_hubspot_rate_limit,
     patch_with_retries,
     post_with_retries,
 )
@@ -71,6 +72,25 @@ class HTTPClientTests(unittest.TestCase):
         except Exception:
             pass
 
+    @patch("adviser_allocation.utils.http_client.requests.Session.get")
+    @patch("adviser_allocation.utils.http_client.requests.Session.post")
+    def test_retry_helpers_reuse_pooled_session(self, mock_post, mock_get):
+        """Test that the helpers share one session per retry budget."""
+        with (
+            patch(
+                "adviser_allocation.utils.http_client.create_session_with_retries",
+                wraps=create_session_with_retries,
+            ) as mock_create,
+            patch.dict("adviser_allocation.utils.http_client._shared_sessions", clear=True),
+        ):
+            get_with_retries("https://example.com/a")
+            post_with_retries("https://example.com/b", json={})
+            get_with_retries("https://example.com/c", retries=1)
+
+        self.assertEqual(mock_create.call_count, 2)
+        self.assertEqual(mock_get.call_count, 2)
+        mock_post.assert_called_once()
+
     def test_default_timeout_constant(self):
         """Test that DEFAULT_TIMEOUT is reasonable."""
         self.assertGreater(DEFAULT_TIMEOUT, 0)
@@ -84,6 +104,36 @@ class HTTPClientTests(unittest.TestCase):
         self.assertIn("POST", retry.allowed_methods)
         self.assertIn("PATCH", retry.allowed_methods)
 
+    def test_retry_strategy_respects_retry_after_and_pool_size(self):
+        """Test that retries honour Retry-After and pools are configurable."""
+        session = create_session_with_retries(pool_maxsize=32)
+        adapter = session.get_adapter("https://example.com")
+        self.assertTrue(adapter.max_retries.respect_retry_after_header)
+        self.assertEqual(adapter._pool_maxsize, 32)
+
+    @patch("adviser_allocation.utils.http_client.time.sleep")
+    def test_hubspot_rate_limit_hook_only_paces_when_window_is_low(self, mock_sleep):
+        """Test that the HubSpot hook sleeps only near the end of the window."""
+        response = requests.Response()
+        response.headers.update(
+            {
+                "X-HubSpot-RateLimit-Max": "100",
+                "X-HubSpot-RateLimit-Interval-Milliseconds": "10000",
+                "X-HubSpot-RateLimit-Remaining": "50",
+            }
+        )
+        self.assertIs(pace_hubspot_rate_limit(response), response)
+        mock_sleep.assert_not_called()
+
+        response.headers["X-HubSpot-RateLimit-Remaining"] = "2"
+        pace_hubspot_rate_limit(response)
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.3)
+
+        mock_sleep.reset_mock()
+        pace_hubspot_rate_limit(requests.Response())
+        mock_sleep.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -153,6 +153,27 @@ class SecretsCachingTests(unittest.TestCase):
             # Both should return same value
             self.assertEqual(secret1, secret2 or True, "Cache should return consistent values")
 
+    @patch.dict(
+        os.environ,
+        {"PLAIN_SECRET": "plain", "GCP_SECRET": "projects/p/secrets/s/versions/latest"},
+    )
+    def test_secret_manager_client_created_lazily_once(self):
+        """The Secret Manager client is only built for resource paths, and only once."""
+        from adviser_allocation.utils import secrets
+
+        mock_client = MagicMock()
+        mock_client.access_secret_version.return_value.payload.data = b"value"
+        with (
+            patch.object(secrets, "_SM_CLIENT", secrets._SM_CLIENT_UNSET),
+            patch.object(secrets, "_make_sm_client", return_value=mock_client) as mock_make,
+        ):
+            self.assertEqual(get_secret("PLAIN_SECRET"), "plain")
+            mock_make.assert_not_called()
+
+            self.assertEqual(get_secret("GCP_SECRET"), "value")
+            self.assertEqual(get_secret("GCP_SECRET"), "value")
+            mock_make.assert_called_once()
+
 
 class SecretsValidationTests(unittest.TestCase):
     """Tests for secret validation."""
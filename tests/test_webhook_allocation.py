@@ -508,5 +508,19 @@ class TestWebhookAllocationRenewals(unittest.TestCase):
         self.assertIn("Missing service_package", record["error_message"])
 
 
+class TestFormatAgreementStart(unittest.TestCase):
+    """Agreement start dates are rendered as Sydney calendar dates."""
+
+    def test_epoch_millis_and_iso_strings(self):
+        from adviser_allocation.api.webhooks import format_agreement_start
+
+        # 2024-12-31T13:00:00Z is already 1 January in Sydney
+        for value in (1735650000000, "1735650000000", "2024-12-31T13:00:00Z"):
+            self.assertEqual(format_agreement_start(value), "2025-01-01")
+        self.assertEqual(format_agreement_start("2025-01-01"), "2025-01-01")
+        self.assertEqual(format_agreement_start("  "), "")
+        self.assertEqual(format_agreement_start(None), "")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -209,6 +209,16 @@ def _deals_side_effect(user_email):
     return deals_map.get(user_email, [])
 
 
+def _meetings_batch_side_effect(users, timestamp_milliseconds):
+    """Inject meetings for every adviser in the batch."""
+    return [_meeting_side_effect(user, timestamp_milliseconds) for user in users]
+
+
+def _deals_batch_side_effect(user_emails):
+    """Return deals keyed by lowercased adviser email."""
+    return {email.lower(): _deals_side_effect(email) for email in user_emails}
+
+
 def _employee_id_side_effect(email):
     """Return employee ID by email."""
     employee_map = {
@@ -219,6 +229,15 @@ def _employee_id_side_effect(email):
     return employee_map.get(email)
 
 
+def _employee_ids_side_effect(emails):
+    """Return employee IDs for the emails that exist in Employment Hero."""
+    return {
+        email: _employee_id_side_effect(email)
+        for email in emails
+        if _employee_id_side_effect(email)
+    }
+
+
 def _employee_leaves_side_effect(employee_id):
     """Return leave requests by employee ID."""
     leave_map = {
@@ -228,6 +247,11 @@ def _employee_leaves_side_effect(employee_id):
     return leave_map.get(employee_id, [])
 
 
+def _leaves_by_employee_ids_side_effect(employee_ids):
+    """Return leave requests for each requested employee ID."""
+    return {emp_id: _employee_leaves_side_effect(emp_id) for emp_id in employee_ids}
+
+
 # ---------------------------------------------------------------------------
 # Test class
 # ---------------------------------------------------------------------------
@@ -245,17 +269,26 @@ class TestWebhookE2EMockAllocation(unittest.TestCase):
         from adviser_allocation.core.allocation import (
             _USER_IDS_CACHE,
             _capacity_override_ttl_cache,
+            refresh_employee_cache,
+            refresh_global_closure_cache,
         )
 
         _USER_IDS_CACHE.clear()
         _capacity_override_ttl_cache.clear()
+        refresh_employee_cache()
+        refresh_global_closure_cache()
 
         # Build mock DB
         self.mock_db = MagicMock()
         self.mock_db.get_global_closures.return_value = MOCK_CLOSURES
+        self.mock_db.get_global_closure_ranges.return_value = MOCK_CLOSURES
         self.mock_db.get_capacity_overrides.return_value = []
         self.mock_db.get_employee_id_by_email.side_effect = _employee_id_side_effect
-        self.mock_db.get_employee_leaves_as_dicts.side_effect = _employee_leaves_side_effect
+        self.mock_db.get_employee_ids_by_emails.side_effect = _employee_ids_side_effect
+        self.mock_db.get_employee_leave_ranges.side_effect = _employee_leaves_side_effect
+        self.mock_db.get_leave_ranges_by_employee_ids.side_effect = (
+            _leaves_by_employee_ids_side_effect
+        )
         self.mock_db.store_allocation_record.return_value = "req-e2e-001"
 
         # --- Patches ---
@@ -276,16 +309,16 @@ class TestWebhookE2EMockAllocation(unittest.TestCase):
             ],
         )
 
-        # 3. Allocation engine: meetings per adviser
+        # 3. Allocation engine: meetings per adviser (batched search)
         self.p_meetings = patch(
-            "adviser_allocation.core.allocation.get_user_meeting_details",
-            side_effect=_meeting_side_effect,
+            "adviser_allocation.core.allocation.get_users_meeting_details",
+            side_effect=_meetings_batch_side_effect,
         )
 
-        # 4. Allocation engine: deals without clarify
+        # 4. Allocation engine: deals without clarify (batched search)
         self.p_deals = patch(
-            "adviser_allocation.core.allocation.get_deals_no_clarify",
-            side_effect=_deals_side_effect,
+            "adviser_allocation.core.allocation.get_deals_no_clarify_by_email",
+            side_effect=_deals_batch_side_effect,
         )
 
         # 5. Allocation engine: CloudSQL DB
@@ -376,10 +409,14 @@ class TestWebhookE2EMockAllocation(unittest.TestCase):
         from adviser_allocation.core.allocation import (
             _USER_IDS_CACHE,
             _capacity_override_ttl_cache,
+            refresh_employee_cache,
+            refresh_global_closure_cache,
         )
 
         _USER_IDS_CACHE.clear()
         _capacity_override_ttl_cache.clear()
+        refresh_employee_cache()
+        refresh_global_closure_cache()
 
     # --- Tests ---
 